@@ -6,13 +6,11 @@ Runs eyes and arms simultaneously and returns to normal mode after 10 seconds
 """
 
 import time
-import board
-import busio
 import smbus
-import threading
 from arms.arms_pwm import (say_hi, express_tired, express_happy, express_sad, express_angry,
                            reset_to_neutral, scan_i2c_devices, angle_to_pulse_value, set_servos, smooth_move)
 from display.eyes_qr import RoboEyesDual
+from i2c_bus import get_bus
 
 # Constants for I2C addresses
 PCA9685_ADDR = 0x40
@@ -21,91 +19,66 @@ RIGHT_EYE_ADDRESS = 0x3D
 
 class RobotController:
     def __init__(self):
-        self.i2c = busio.I2C(board.SCL, board.SDA)
+        self.i2c = get_bus().client("arm_eyes")
         self.eyes = RoboEyesDual(LEFT_EYE_ADDRESS, RIGHT_EYE_ADDRESS)
         self.eyes.begin(128, 64, 40)
-        self.current_eye_thread = None
-        self.stop_event = None
+        # Single render loop owns both displays; emotions only queue mood changes
+        self.eyes.start("default")
 
-    def run_emotion(self, arm_func, eye_func):
+    def run_emotion(self, arm_func, mood, duration=1):
         """Run arm movement and eye expression simultaneously, then return to normal mode"""
-        # Create a new stop event for this expression
-        self.stop_event = threading.Event()
-        
-        # Start eye expression in a separate thread
-        self.current_eye_thread = threading.Thread(target=eye_func, args=(self.stop_event,))
-        self.current_eye_thread.daemon = True  # Ensure thread exits when main program does
-        self.current_eye_thread.start()
+        self.eyes.show_mood(mood)
         
         # Run arm movement in the main thread
-        arm_func()
-        
-        # Wait for 10 seconds total (including arm movement time)
-        time.sleep(1)
+        if arm_func:
+            arm_func()
         
-        # Stop the current eye expression
-        self.stop_event.set()
-        if self.current_eye_thread:
-            self.current_eye_thread.join(timeout=1.0)  # Wait for thread to terminate
-            self.current_eye_thread = None
-        self.stop_event = None
+        # Wait before returning to normal (including arm movement time)
+        time.sleep(duration)
         
         # Return to normal mode
         self.normal()
 
     def hi(self):
         print("Expressing Hi")
-        self.run_emotion(say_hi, self.eyes.Happy)
+        self.run_emotion(say_hi, "happy")
 
     def normal(self):
         print("Expressing Normal")
-        # Run both arms and eyes for normal mode
-        self.stop_event = threading.Event()
-        self.current_eye_thread = threading.Thread(target=self.eyes.Default, args=(self.stop_event,))
-        self.current_eye_thread.daemon = True
-        self.current_eye_thread.start()
-        # Normal mode persists until next command, so don't stop the eye thread
-        # Clear stop event but keep thread running
-        self.stop_event = None
+        # Normal mode persists until next command
+        self.eyes.show_mood("default")
 
     def happy(self):
         print("Expressing Happy")
-        self.run_emotion(express_happy, self.eyes.Happy)
+        self.run_emotion(express_happy, "happy")
 
     def sad(self):
         print("Expressing Sad")
-        self.run_emotion(express_sad, self.eyes.Tired)
+        self.run_emotion(express_sad, "tired")
 
     def angry(self):
         print("Expressing Angry")
-        self.run_emotion(express_angry, self.eyes.Angry)
+        self.run_emotion(express_angry, "angry")
 
     def love(self):
         print("Expressing Love")
-        self.run_emotion(express_happy, self.eyes.Love)
+        self.run_emotion(express_happy, "love")
         
         
-    def qr(self, device_id):
+    def qr(self, device_id, duration=15):
         """Express QR code with the specified device ID"""
         print(f"Expressing QR with device ID: {device_id}")
-        self.run_emotion(None, self.eyes.QR(device_id))
+        self.eyes.show_qr(device_id)
+        time.sleep(duration)
+        self.normal()
         
     def cleanup(self):
         """Clean up resources, clear displays, and deinitialize I2C bus to clear SCL and SDA."""
         print("🖥️ Cleaning up RobotController resources...")
-        # Stop any running eye thread
-        if self.stop_event:
-            self.stop_event.set()
-        if self.current_eye_thread:
-            self.current_eye_thread.join(timeout=1.0)
-            self.current_eye_thread = None
-        # Reset arms and clear displays
+        # Reset arms, stop the eye render loop and clear displays
         try:
             reset_to_neutral()
-            self.eyes.display_left.fill(0)
-            self.eyes.display_left.show()
-            self.eyes.display_right.fill(0)
-            self.eyes.display_right.show()
+            self.eyes.stop()
             print("🖥️ Displays cleared")
         except Exception as e:
             print(f"🖥️ Error clearing displays: {e}")
@@ -2,8 +2,10 @@ import time
 import random
 import smbus
 from adafruit_pca9685 import PCA9685
-import board
-import busio
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from i2c_bus import get_bus, PRIORITY_SERVO
 
 # Define constants
 # I2C address
@@ -13,8 +15,8 @@ PCA9685_ADDR = 0x40    # Default address for PCA9685 PWM controller
 RIGHT_SERVO_CHANNEL = 0  # Channel 0 on PCA9685
 LEFT_SERVO_CHANNEL = 1   # Channel 1 on PCA9685
 
-# Initialize I2C bus
-i2c = busio.I2C(board.SCL, board.SDA)
+# Shared I2C bus handle (servo priority)
+i2c = get_bus().client("arms", PRIORITY_SERVO)
 
 # Initialize PCA9685 PWM controller
 pwm = PCA9685(i2c, address=PCA9685_ADDR)
@@ -23,13 +23,12 @@ import re
 import random
 import errno
 import threading
-import board
-import busio
 import smbus
 import RPi.GPIO as GPIO
 from arms.arms_pwm import (say_hi, express_tired, express_happy, express_sad, express_angry,
                            reset_to_neutral, scan_i2c_devices, angle_to_pulse_value, set_servos, smooth_move)
 from display.eyes_qr import RoboEyesDual
+from i2c_bus import get_bus
 from interaction.play_song1 import play_music
 from Communication.sender import AudioNode, start_audio_node
 from datetime import datetime, timezone
@@ -50,96 +49,74 @@ RIGHT_EYE_ADDRESS = 0x3D
 # Global variables for hardware control
 i2c = None
 eyes = None
-current_eye_thread = None
-stop_event = None
+speech_lock = threading.Lock()  # One utterance at a time, including speech from other threads
 
 # LED pin configuration
 LED_PIN = 18  # GPIO pin number (Pin 12)
 
 def initialize_hardware():
-    """Initialize I2C and eyes globally."""
+    """Initialize I2C and eyes globally and start the single eye render loop."""
     global i2c, eyes
-    i2c = busio.I2C(board.SCL, board.SDA)
+    i2c = get_bus().client("assistant")
     eyes = RoboEyesDual(LEFT_EYE_ADDRESS, RIGHT_EYE_ADDRESS)
     eyes.begin(128, 64, 40)
+    eyes.start("default")
 
-def run_emotion(arm_func, eye_func, duration=1):
+def run_emotion(arm_func, mood, duration=1):
     """Run arm movement and eye expression simultaneously, then return to normal mode"""
-    global current_eye_thread, stop_event
-    stop_event = threading.Event()
-    
-    current_eye_thread = threading.Thread(target=eye_func, args=(stop_event,))
-    current_eye_thread.daemon = True
-    current_eye_thread.start()
+    eyes.show_mood(mood)
     
     if arm_func:
         arm_func()
     
     time.sleep(duration)
     
-    stop_event.set()
-    if current_eye_thread:
-        current_eye_thread.join(timeout=1.0)
-        current_eye_thread = None
-    stop_event = None
-    
     normal()
 
 def hi():
     print("Expressing Hi")
-    run_emotion(say_hi, eyes.Happy)
+    run_emotion(say_hi, "happy")
 
 def normal():
     print("Expressing Normal")
-    global current_eye_thread, stop_event
-    stop_event = threading.Event()
-    current_eye_thread = threading.Thread(target=eyes.Default, args=(stop_event,))
-    current_eye_thread.daemon = True
-    current_eye_thread.start()
-    stop_event = None
+    eyes.show_mood("default")
 
 def happy():
     print("Expressing Happy")
-    run_emotion(express_happy, eyes.Happy)
+    run_emotion(express_happy, "happy")
 
 def sad():
     print("Expressing Sad")
-    run_emotion(express_sad, eyes.Tired)
+    run_emotion(express_sad, "tired")
 
 def angry():
     print("Expressing Angry")
-    run_emotion(express_angry, eyes.Angry)
+    run_emotion(express_angry, "angry")
 
 def love():
     print("Expressing Love")
-    run_emotion(express_happy, eyes.Love)
+    run_emotion(express_happy, "love")
     
-def qr(device_id):
+def qr(device_id, duration=15):
     """Express QR code with the specified device ID"""
     print(f"Expressing QR with device ID: {device_id}")
-    run_emotion(None, lambda stop_event: eyes.QR(device_id, stop_event=stop_event), duration=15)
+    eyes.show_qr(device_id)
+    time.sleep(duration)
+    normal()
 
 def cleanup():
     """Clean up resources, clear displays, and deinitialize I2C bus."""
-    global i2c, eyes, current_eye_thread, stop_event
+    global i2c, eyes
     print("🖥️ Cleaning up resources...")
-    if stop_event:
-        stop_event.set()
-    if current_eye_thread:
-        current_eye_thread.join(timeout=1.0)
-        current_eye_thread = None
     try:
         reset_to_neutral()
-        eyes.display_left.fill(0)
-        eyes.display_left.show()
-        eyes.display_right.fill(0)
-        eyes.display_right.show()
+        eyes.stop()
         print("🖥️ Displays cleared")
     except Exception as e:
         print(f"🖥️ Error clearing displays: {e}")
     try:
         i2c.deinit()
-        print("🖥️ I2C bus deinitialized, SCL and SDA cleared")
+        print("🖥️ I2C handle released")
     except Exception as e:
         print(f"🖥️ Error deinitializing I2C bus: {e}")
     print("🖥️ Cleanup complete")
@@ -231,27 +208,31 @@ def amplify_audio(input_file, output_file, gain_db=10):
     ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
 async def speak_text(text):
-    """Speak using Edge TTS."""
+    """Speak using Edge TTS (waits for any other speech to finish first)."""
     voice = "en-GB-SoniaNeural"
     filename = "response.mp3"
     boosted_file = "boosted_response.mp3"
 
-    tts = edge_tts.Communicate(text, voice)
-    await tts.save(filename)
+    await asyncio.to_thread(speech_lock.acquire)
+    try:
+        tts = edge_tts.Communicate(text, voice)
+        await tts.save(filename)
 
-    amplify_audio(filename, boosted_file, gain_db=20)
+        amplify_audio(filename, boosted_file, gain_db=20)
 
-    pygame.mixer.music.load(boosted_file)
-    pygame.mixer.music.set_volume(1.0)
-    pygame.mixer.music.play()
-    while pygame.mixer.music.get_busy():
-        await asyncio.sleep(0.25)
+        pygame.mixer.music.load(boosted_file)
+        pygame.mixer.music.set_volume(1.0)
+        pygame.mixer.music.play()
+        while pygame.mixer.music.get_busy():
+            await asyncio.sleep(0.25)
 
-    pygame.mixer.music.stop()
-    pygame.mixer.music.unload()
+        pygame.mixer.music.stop()
+        pygame.mixer.music.unload()
 
-    os.remove(filename)
-    os.remove(boosted_file)
+        os.remove(filename)
+        os.remove(boosted_file)
+    finally:
+        speech_lock.release()
 
 def listen(
         recognizer: sr.Recognizer,
@@ -660,7 +641,7 @@ async def start_assistant_from_text(prompt_text):
         
             await asyncio.gather(
                 speak_text("Showing QR now, scan this using the user PEBO mobile app"),
-                asyncio.to_thread(run_emotion, None, lambda stop_event: eyes.QR(device_id, stop_event=stop_event), duration=15)
+                asyncio.to_thread(qr, device_id)
             )
             await asyncio.to_thread(normal)
             continue
@@ -914,7 +895,7 @@ async def monitor_new():
                 
                     await asyncio.gather(
                         speak_text("Showing QR now, scan this using the user PEBO mobile app"),
-                        asyncio.to_thread(run_emotion, None, lambda stop_event: eyes.QR(device_id, stop_event=stop_event), duration=15)
+                        asyncio.to_thread(qr, device_id)
                     )
                     await asyncio.to_thread(normal)  # Return to normal state
                     continue
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Display backends for the dual OLED eyes
+
+"ssd1306"  the two real SSD1306 panels on the I2C bus (adafruit driver)
+"i2cdev"   the real panels through the block-transfer driver in ssd1306_i2cdev.py
+"virtual"  in-memory panels that emulate SSD1306 addressing, keep the pixels
+           the real panel would show and count the bytes that would be sent
+
+The real panels go through the shared bus owner in i2c_bus.py at display priority.
+
+The adafruit/bus imports only happen for the "ssd1306" backend, so the
+eye renderers can be imported, profiled and benchmarked off the robot.
+The default backend can be overridden with PEBO_EYES_BACKEND=virtual.
+"""
+
+import os
+from collections import deque
+
+import numpy as np
+
+SSD1306 = "ssd1306"
+I2CDEV = "i2cdev"
+VIRTUAL = "virtual"
+
+# SSD1306 commands the virtual panel tracks
+SET_COL_ADDR = 0x21
+SET_PAGE_ADDR = 0x22
+
+
+class VirtualI2CDevice:
+    """Records the transactions a panel would put on the bus and feeds them to the panel"""
+
+    def __init__(self, panel):
+        self.panel = panel
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def write(self, buf, start=0, end=None):
+        data = bytes(buf[start:end])
+        self.panel.bytes_sent += len(data)
+        self.panel.transactions += 1
+        self.panel.receive(data)
+
+
+class VirtualSSD1306:
+    """In-memory SSD1306_I2C stand-in (horizontal addressing mode)"""
+
+    def __init__(self, width=128, height=64, addr=0x3C, max_frames=0):
+        self.width = width
+        self.height = height
+        self.pages = height // 8
+        self.addr = addr
+        # Same layout as adafruit SSD1306_I2C: control byte, then page data
+        self.buffer = bytearray(self.pages * width + 1)
+        self.buffer[0] = 0x40
+        self.i2c_device = VirtualI2CDevice(self)
+        self.ram = bytearray(self.pages * width)  # What the panel is showing
+        self.frames = deque(maxlen=max_frames)    # Snapshots of ram after each show()
+        self.bytes_sent = 0
+        self.transactions = 0
+        self.shows = 0
+        self._pending = []
+        self._col = (0, width - 1)
+        self._page = (0, self.pages - 1)
+        self._x = 0
+        self._p = 0
+
+    def receive(self, data):
+        """Apply one I2C write the way the controller would"""
+        if not data:
+            return
+        if data[0] == 0x80:  # Co=1, D/C#=0: single command byte
+            self._command(data[1])
+        elif data[0] == 0x00:  # Co=0, D/C#=0: command stream
+            for cmd in data[1:]:
+                self._command(cmd)
+        elif data[0] == 0x40:  # Co=0, D/C#=1: data stream
+            for value in data[1:]:
+                self.ram[self._p * self.width + self._x] = value
+                self._x += 1
+                if self._x > self._col[1]:
+                    self._x = self._col[0]
+                    self._p += 1
+                    if self._p > self._page[1]:
+                        self._p = self._page[0]
+
+    def _command(self, cmd):
+        self._pending.append(cmd)
+        if self._pending[0] not in (SET_COL_ADDR, SET_PAGE_ADDR):
+            self._pending = []
+        elif len(self._pending) == 3:
+            command, first, last = self._pending
+            if command == SET_COL_ADDR:
+                self._col = (first, last)
+                self._x = first
+            else:
+                self._page = (first, last)
+                self._p = first
+            self._pending = []
+
+    def write_cmd(self, cmd):
+        with self.i2c_device:
+            self.i2c_device.write(bytes((0x80, cmd)))
+
+    def fill(self, color):
+        self.buffer[1:] = (b"\xff" if color else b"\x00") * (len(self.buffer) - 1)
+
+    def image(self, img):
+        """Copy a 1-bit PIL image of the panel size into the buffer (like the adafruit driver)"""
+        pixels = np.asarray(img.convert('1'), dtype=bool)
+        pages = np.packbits(pixels.reshape(self.pages, 8, self.width), axis=1, bitorder='little')
+        self.buffer[1:] = pages.tobytes()
+
+    def show(self):
+        for cmd in (SET_COL_ADDR, 0, self.width - 1, SET_PAGE_ADDR, 0, self.pages - 1):
+            self.write_cmd(cmd)
+        with self.i2c_device:
+            self.i2c_device.write(self.buffer)
+        self.shows += 1
+        if self.frames.maxlen:
+            self.frames.append(bytes(self.ram))
+
+    def reset_stats(self):
+        self.bytes_sent = 0
+        self.transactions = 0
+        self.shows = 0
+
+
+class RecordingI2CBus:
+    """Fake i2c-dev bus for the block-transfer driver: records every i2c_rdwr call
+    
+    Each entry in transfers is one ioctl: a list of (address, bytes) messages.
+    Messages are also fed to any VirtualSSD1306 registered for their address.
+    """
+
+    def __init__(self, panels=None):
+        self.transfers = []
+        self.panels = {panel.addr: panel for panel in (panels or [])}
+
+    def i2c_rdwr(self, *msgs):
+        transfer = [(msg.addr, bytes(msg)) for msg in msgs]
+        self.transfers.append(transfer)
+        for addr, data in transfer:
+            panel = self.panels.get(addr)
+            if panel:
+                panel.bytes_sent += len(data)
+                panel.transactions += 1
+                panel.receive(data)
+
+    def bytes_sent(self):
+        return sum(len(data) for transfer in self.transfers for _, data in transfer)
+
+
+def create_displays(backend=None, left_address=0x3C, right_address=0x3D, width=128, height=64):
+    """Return the (left, right) panel objects for the chosen backend"""
+    backend = backend or os.environ.get("PEBO_EYES_BACKEND", SSD1306)
+    if backend == VIRTUAL:
+        return (VirtualSSD1306(width, height, left_address),
+                VirtualSSD1306(width, height, right_address))
+    if backend == SSD1306:
+        import adafruit_ssd1306
+        from i2c_bus import get_bus, PRIORITY_DISPLAY
+        i2c = get_bus().client("eyes", PRIORITY_DISPLAY, posted=True)
+        return (adafruit_ssd1306.SSD1306_I2C(width, height, i2c, addr=left_address),
+                adafruit_ssd1306.SSD1306_I2C(width, height, i2c, addr=right_address))
+    if backend == I2CDEV:
+        from display.ssd1306_i2cdev import SSD1306I2CDev
+        from i2c_bus import get_bus, PRIORITY_DISPLAY
+        bus = get_bus().client("eyes", PRIORITY_DISPLAY, posted=True)
+        return (SSD1306I2CDev(width, height, bus, addr=left_address),
+                SSD1306I2CDev(width, height, bus, addr=right_address))
+    raise ValueError(f"Unknown eye display backend: {backend}")
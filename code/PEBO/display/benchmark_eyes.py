@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Eye renderer benchmark on the virtual SSD1306 backend
+
+Runs every mood (Default, Happy, Tired, Angry, Love, QR) through RoboEyesDual
+headlessly and reports, per mood:
+  fps        frames/sec the renderer could sustain (render time only; the
+             animation clock advances 1/fps per frame, so the frames drawn
+             are the ones the robot would show at --fps)
+  mean/p95   per-frame render time in ms
+  bytes      I2C bytes per frame across both panels
+  bus ms     time those bytes take on a 400 kHz bus (9 clocks per byte)
+Moods run back to back, so each mood's numbers include its transition in.
+
+Run from code/PEBO before each deploy to get regression numbers:
+  python3 -m display.benchmark_eyes --frames 500
+  python3 -m display.benchmark_eyes --pack /home/pi/eyes.pack
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from display.eye_pack import SimClock
+from display.eyes_qr import RoboEyesDual
+
+MOODS = ["default", "happy", "tired", "angry", "love", "qr"]
+I2C_HZ = 400_000
+QR_SAMPLE = "-OUukosDkZuvHboo-qX5"
+
+
+def bench_mood(eyes, mood, frames):
+    """Render frames of one mood and return timing and bus statistics"""
+    if mood == "qr":
+        eyes._handle_command("qr", QR_SAMPLE)
+    else:
+        eyes._handle_command("mood", mood)
+    panels = (eyes.display_left, eyes.display_right)
+    for panel in panels:
+        panel.reset_stats()
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        eyes.render_frame()
+        times.append(time.perf_counter() - start)
+        eyes.clock.tick()
+    bytes_per_frame = sum(panel.bytes_sent for panel in panels) / frames
+    mean = statistics.mean(times)
+    return {
+        "mood": mood,
+        "fps": 1 / mean if mean else float("inf"),
+        "mean_ms": mean * 1000,
+        "p95_ms": sorted(times)[int(len(times) * 0.95) - 1] * 1000,
+        "bytes": bytes_per_frame,
+        "bus_ms": bytes_per_frame * 9 / I2C_HZ * 1000,
+    }
+
+
+def run(frames=300, fps=40, pack=None, seed=1):
+    """Benchmark all moods and return one result dict per mood"""
+    random.seed(seed)
+    eyes = RoboEyesDual(backend="virtual")
+    eyes.begin(128, 64, fps)
+    eyes.clock = SimClock(fps)  # Animations advance one frame per render, as on the robot at this fps
+    if pack:
+        eyes.load_pack(pack)
+    return [bench_mood(eyes, mood, frames) for mood in MOODS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the eye renderer on the virtual backend")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--fps", type=int, default=40)
+    parser.add_argument("--pack", help="compiled mood pack to play instead of live drawing")
+    args = parser.parse_args()
+
+    print(f"{'mood':8s} {'fps':>9s} {'mean ms':>8s} {'p95 ms':>8s} {'bytes':>8s} {'bus ms':>7s}")
+    for r in run(args.frames, args.fps, args.pack):
+        print(f"{r['mood']:8s} {r['fps']:9.0f} {r['mean_ms']:8.3f} {r['p95_ms']:8.3f} "
+              f"{r['bytes']:8.0f} {r['bus_ms']:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
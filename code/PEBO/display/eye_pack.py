@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Precompiled mood animation packs for RoboEyesDual
+
+The eye moods are deterministic once blink and idle timing are taken out, so
+they can be rendered ahead of time. The compiler drives RoboEyesDual with a
+simulated clock and records every frame as packed 1-bit SSD1306 page data
+(left + right panel). Frames are grouped into named segments per mood:
+
+  <mood>/enter    transition into the mood from open Default eyes
+  <mood>/hold     steady state, looped (a full heart spin for Love)
+  <mood>/blink    one blink from the steady state back to it
+  default/gaze_*  look towards one of the 8 positions and back to center
+
+At runtime the pack is memory-mapped and PackPlayer copies frames into the
+panel buffers, picking blink/gaze segments at randomized intervals the same
+way the live autoblinker and idle mode do.
+
+Build the pack (renders on the virtual backend, so any host with PIL/NumPy works):
+  python3 -m display.eye_pack /home/pi/eyes.pack --fps 40
+"""
+
+import argparse
+import mmap
+import random
+import struct
+import time
+from math import pi
+
+PACK_MAGIC = b"PEBOEYE1"
+PACK_VERSION = 1
+HEADER = struct.Struct("<8sHHHHI")    # magic, version, width, height, fps, segment count
+SEGMENT = struct.Struct("<32sII")     # name, first frame, frame count
+
+MOODS = ["default", "happy", "tired", "angry", "love"]
+GAZE_POSITIONS = {"n": 1, "ne": 2, "e": 3, "se": 4, "s": 5, "sw": 6, "w": 7, "nw": 8}
+
+# Blink interval/variation and idle (gaze) interval/variation used by the live mood setups
+MOOD_TIMING = {
+    "default": (5, 0.5, 2, 2),
+    "happy": (3, 0.5, None, None),
+    "tired": (3, 0.5, None, None),
+    "angry": (4, 0.5, None, None),
+    "love": (None, None, None, None),
+}
+
+
+class SimClock:
+    """Frame-stepped clock so timed animations (laugh, confused) compile deterministically"""
+
+    def __init__(self, fps):
+        self.now = 0.0
+        self.step = 1 / fps
+
+    def __call__(self):
+        return self.now
+
+    def tick(self):
+        self.now += self.step
+
+
+def _capture(eyes, clock):
+    """Render one frame and return the left + right page data"""
+    eyes.draw_eyes()
+    clock.tick()
+    return bytes(eyes.display_left.buffer[1:]) + bytes(eyes.display_right.buffer[1:])
+
+
+def _record_until_settled(eyes, clock, min_frames=2, max_frames=120):
+    """Record frames until three consecutive frames are identical
+    
+    Two are not enough: a blink shows two blank frames while the eye turns around.
+    """
+    frames = []
+    while len(frames) < max_frames:
+        frame = _capture(eyes, clock)
+        if len(frames) >= max(min_frames, 2) and frame == frames[-1] == frames[-2]:
+            frames.pop()
+            break
+        frames.append(frame)
+    return frames
+
+
+def _record(eyes, clock, count):
+    return [_capture(eyes, clock) for _ in range(count)]
+
+
+def _heart_cycle_frames(speed, fps):
+    """Frame count closest to a whole number of heart spins, at least one second long"""
+    return min(range(fps, 4 * fps), key=lambda n: abs((n * speed) / (2 * pi) - round(n * speed / (2 * pi))))
+
+
+def _quiet_setup(eyes, mood):
+    """Apply a mood but leave blink and idle timing to the player"""
+    eyes.mood_setups[mood]()
+    eyes.set_autoblinker(False)
+    eyes.set_idle_mode(False)
+
+
+def compile_segments(eyes, fps):
+    """Render every mood into an ordered list of (name, frames)"""
+    clock = SimClock(fps)
+    eyes.clock = clock
+    eyes.set_framerate(fps)
+    segments = []
+
+    # Default enters from the closed eyes left by begin()
+    _quiet_setup(eyes, "default")
+    segments.append(("default/enter", _record_until_settled(eyes, clock)))
+
+    for mood in MOODS:
+        if mood != "default":
+            _quiet_setup(eyes, "default")
+            _record_until_settled(eyes, clock)
+            _quiet_setup(eyes, mood)
+            if mood == "love":
+                eyes.heart_animation_angle = 0
+                hold = _record(eyes, clock, _heart_cycle_frames(eyes.heart_animation_speed, fps))
+                segments.append(("love/hold", hold))
+                continue
+            # Laugh/confused flicker runs for 0.5 s before the mood settles
+            segments.append((f"{mood}/enter", _record_until_settled(eyes, clock, min_frames=fps // 2)))
+        segments.append((f"{mood}/hold", _record(eyes, clock, max(1, fps // 4))))
+        eyes.blink()
+        segments.append((f"{mood}/blink", _record_until_settled(eyes, clock)))
+
+    for name, position in GAZE_POSITIONS.items():
+        _quiet_setup(eyes, "default")
+        _record_until_settled(eyes, clock)
+        eyes.set_position(position)
+        frames = _record_until_settled(eyes, clock)
+        frames += _record(eyes, clock, fps // 2)
+        eyes.set_position(0)
+        frames += _record_until_settled(eyes, clock)
+        segments.append((f"default/gaze_{name}", frames))
+
+    eyes.clock = time.time
+    return segments
+
+
+def write_pack(path, segments, width, height, fps):
+    """Write segments as one binary pack: header, segment table, then frame data"""
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, width, height, fps, len(segments)))
+        first = 0
+        for name, frames in segments:
+            f.write(SEGMENT.pack(name.encode("utf-8"), first, len(frames)))
+            first += len(frames)
+        for _, frames in segments:
+            for frame in frames:
+                f.write(frame)
+
+
+class EyePack:
+    """Read-only, memory-mapped view of a compiled pack"""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.width, self.height, self.fps, count = HEADER.unpack_from(self.data, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError(f"{path} is not a version {PACK_VERSION} eye pack")
+        self.panel_bytes = (self.height // 8) * self.width
+        self.frame_bytes = 2 * self.panel_bytes
+        self.segments = {}
+        for i in range(count):
+            name, first, frames = SEGMENT.unpack_from(self.data, HEADER.size + i * SEGMENT.size)
+            self.segments[name.rstrip(b"\0").decode("utf-8")] = (first, frames)
+        self.frames_offset = HEADER.size + count * SEGMENT.size
+        self.view = memoryview(self.data)
+
+    def length(self, name):
+        return self.segments[name][1]
+
+    def frame(self, name, index):
+        """Return (left, right) page data for one frame as zero-copy memoryviews"""
+        first, _ = self.segments[name]
+        start = self.frames_offset + (first + index) * self.frame_bytes
+        middle = start + self.panel_bytes
+        return self.view[start:middle], self.view[middle:middle + self.panel_bytes]
+
+    def close(self):
+        self.view.release()
+        self.data.close()
+        self.file.close()
+
+
+class PackPlayer:
+    """Sequences pack segments for the current mood with randomized blink/gaze timing"""
+
+    def __init__(self, pack):
+        self.pack = pack
+        self.mood = None
+        self.segment = None
+        self.index = 0
+        self.pending = []
+        self.gazes = [name for name in pack.segments if name.startswith("default/gaze_")]
+
+    def covers(self, mood):
+        return f"{mood}/hold" in self.pack.segments
+
+    def _schedule(self, interval, variation):
+        if interval is None:
+            return None
+        return time.monotonic() + interval + random.random() * variation
+
+    def start(self, mood):
+        """Switch to a mood, playing its enter transition first when there is one"""
+        self.mood = mood
+        self.segment = None
+        self.pending = [name for name in (f"{mood}/enter",) if name in self.pack.segments]
+        self.timing = MOOD_TIMING.get(mood, MOOD_TIMING["default"])
+        blink_interval, blink_variation, idle_interval, idle_variation = self.timing
+        self.next_blink = self._schedule(blink_interval, blink_variation)
+        self.next_gaze = self._schedule(idle_interval, idle_variation)
+
+    def _next_segment(self):
+        if self.pending:
+            return self.pending.pop(0)
+        now = time.monotonic()
+        blink_interval, blink_variation, idle_interval, idle_variation = self.timing
+        if self.next_blink is not None and now >= self.next_blink and f"{self.mood}/blink" in self.pack.segments:
+            self.next_blink = self._schedule(blink_interval, blink_variation)
+            return f"{self.mood}/blink"
+        if self.next_gaze is not None and now >= self.next_gaze and self.mood == "default" and self.gazes:
+            self.next_gaze = self._schedule(idle_interval, idle_variation)
+            return random.choice(self.gazes)
+        return f"{self.mood}/hold"
+
+    def step(self, eyes):
+        """Copy the next frame into both panel buffers and flush the changes"""
+        if self.segment is None or self.index >= self.pack.length(self.segment):
+            self.segment = self._next_segment()
+            self.index = 0
+        left, right = self.pack.frame(self.segment, self.index)
+        self.index += 1
+        eyes.display_left.buffer[1:] = left
+        eyes.flush(eyes.display_left)
+        eyes.display_right.buffer[1:] = right
+        eyes.flush(eyes.display_right)
+
+
+def build(path, fps=40):
+    """Compile all moods from RoboEyesDual into a pack file"""
+    from display.eyes_qr import RoboEyesDual
+    eyes = RoboEyesDual(backend="virtual")
+    eyes.begin(128, 64, fps)
+    segments = compile_segments(eyes, fps)
+    write_pack(path, segments, eyes.display_left.width, eyes.display_left.height, fps)
+    frames = sum(len(frames) for _, frames in segments)
+    print(f"Wrote {len(segments)} segments, {frames} frames to {path}")
+    return segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile RoboEyesDual moods into a memory-mapped frame pack")
+    parser.add_argument("output", nargs="?", default="eyes.pack")
+    parser.add_argument("--fps", type=int, default=40)
+    args = parser.parse_args()
+    build(args.output, args.fps)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,10 +15,11 @@ corrected ellipse positioning, and Love mood with animated hearts
 """
 
 import time
-import board
-import busio
 from PIL import Image, ImageDraw
-import adafruit_ssd1306
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from display.backends import create_displays
 import random
 from math import sin, cos, pow
 import threading
@@ -45,12 +46,9 @@ W = 7   # west, middle left
 NW = 8  # north-west, top left
 
 class RoboEyesDual:
-    def __init__(self, left_address=0x3C, right_address=0x3D):
-        i2c = busio.I2C(board.SCL, board.SDA)
-
-        # Create the displays with their actual dimensions
-        self.display_left = adafruit_ssd1306.SSD1306_I2C(128, 64, i2c, addr=left_address)
-        self.display_right = adafruit_ssd1306.SSD1306_I2C(128, 64, i2c, addr=right_address)
+    def __init__(self, left_address=0x3C, right_address=0x3D, backend=None):
+        # Create the displays with their actual dimensions ("ssd1306" or "virtual" backend)
+        self.display_left, self.display_right = create_displays(backend, left_address, right_address)
 
         # Set screen dimensions for drawing canvas (rotated 90 degrees)
         self.screen_width = 64
@@ -9,10 +9,11 @@ Modified for dual display setup and rotation fix
 """
 
 import time
-import board
-import busio
 from PIL import Image, ImageDraw
-import adafruit_ssd1306
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from display.backends import create_displays
 import random
 
 # Constants for mood types
@@ -37,13 +38,10 @@ NW = 8  # north-west, top left
 
 
 class RoboEyesDual:
-    def __init__(self, left_address=0x3D, right_address=0x3C):
-        i2c = busio.I2C(board.SCL, board.SDA)
-
-        # Create the displays with their actual dimensions
+    def __init__(self, left_address=0x3D, right_address=0x3C, backend=None):
+        # Create the displays with their actual dimensions ("ssd1306" or "virtual" backend)
         # For 90 degree clockwise rotation, we're working with 128x64 displays
-        self.display_left = adafruit_ssd1306.SSD1306_I2C(128, 64, i2c, addr=left_address)
-        self.display_right = adafruit_ssd1306.SSD1306_I2C(128, 64, i2c, addr=right_address)
+        self.display_left, self.display_right = create_displays(backend, left_address, right_address)
 
         # Set screen dimensions for our drawing canvas
         # Since we're rotating 90 degrees clockwise, we'll swap width and height
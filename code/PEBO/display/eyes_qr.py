@@ -9,6 +9,14 @@ Increased blinking speed by reducing interval and speeding up height transition
 Fixed bottom ellipses crossing above top ellipses during blink
 Added Love mood with parametric heart shapes, faster y-axis rotation, and bouncing effect
 Added QR mood to display QR codes on both eyes encoding a 6-digit device ID
+Added a single persistent render loop that owns both displays and takes mood,
+position and QR commands over a queue, with deadline-based frame pacing
+Added dirty-page delta flushing: only changed SSD1306 page/column ranges are sent
+Draws into preallocated canvases and packs them straight into the panels' native
+page layout with NumPy (no per-frame Image allocation, rotate or image() call)
+Can play moods from a precompiled, memory-mapped animation pack (see eye_pack.py)
+Panels come from a pluggable backend (see backends.py), so it also runs headless
+Eye geometry eases by wall-clock time (see tween.py), independent of frame rate
 
 Original Copyright (C) 2024 Dennis Hoelscher
 Modified for dual display setup, rotation fix, emotion functions, blink fix, faster blinking,
@@ -16,14 +24,19 @@ corrected ellipse positioning, Love mood with animated hearts, and QR code displ
 """
 
 import time
-import board
-import busio
 from PIL import Image, ImageDraw
-import adafruit_ssd1306
+import numpy as np
 import random
-from math import sin, cos, pow
+from math import sin, cos
 import threading
+import queue
+from functools import lru_cache
 import qrcode
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from display.backends import create_displays
+from display.tween import Tween
 
 # Constants for mood types
 DEFAULT = 0
@@ -47,19 +60,65 @@ SW = 6  # south-west, bottom left
 W = 7   # west, middle left
 NW = 8  # north-west, top left
 
-class RoboEyesDual:
-    def __init__(self, left_address=0x3C, right_address=0x3D):
-        i2c = busio.I2C(board.SCL, board.SDA)
+# Commands accepted by the render loop
+CMD_MOOD = "mood"
+CMD_POSITION = "position"
+CMD_QR = "qr"
+CMD_STOP = "stop"
+
+# SSD1306 addressing commands used for partial (dirty-region) updates
+SET_COL_ADDR = 0x21
+SET_PAGE_ADDR = 0x22
+# Tween durations (seconds) for the eye geometry
+HEIGHT_TWEEN = 0.08
+POSITION_TWEEN = 0.12
+EYELID_TWEEN = 0.1
+
+# Above this fraction of changed bytes a single full-frame write is cheaper
+FULL_FLUSH_RATIO = 0.75
+
+# Bit-reversal table: PIL packs '1' images MSB-first, SSD1306 pages are LSB-top
+BIT_REVERSE = np.array([int(f"{i:08b}"[::-1], 2) for i in range(256)], dtype=np.uint8)
+
+# Unit heart outline (t = 0 to 2*pi in steps of 0.01), computed once at import
+HEART_T = np.arange(628) / 100
+HEART_X = 16 * np.sin(HEART_T) ** 3
+HEART_Y = 16 * np.cos(HEART_T) - 5 * np.cos(2 * HEART_T) - 2 * np.cos(3 * HEART_T) - np.cos(4 * HEART_T)
 
-        # Create the displays with their actual dimensions
-        self.display_left = adafruit_ssd1306.SSD1306_I2C(128, 64, i2c, addr=left_address)
-        self.display_right = adafruit_ssd1306.SSD1306_I2C(128, 64, i2c, addr=right_address)
+@lru_cache(maxsize=8)
+def render_qr(qr_data, size):
+    """Encode qr_data and rasterize it to a size x size 1-bit image (cached per payload and size)"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=max(1, size // 21),  # Scale to fit 21x21 QR code within size
+        border=0
+    )
+    qr.add_data(qr_data)
+    qr.make(fit=True)
+    qr_img = qr.make_image(fill_color="white", back_color="black").convert('1')
+    # Resize to fit within display
+    return qr_img.resize((size, size), Image.NEAREST)
+
+class RoboEyesDual:
+    def __init__(self, left_address=0x3C, right_address=0x3D, displays=None, backend=None):
+        if displays:
+            # Pre-built panel objects (anything with the SSD1306_I2C surface)
+            self.display_left, self.display_right = displays
+        else:
+            # Create the displays with their actual dimensions ("ssd1306" or "virtual")
+            self.display_left, self.display_right = create_displays(backend, left_address, right_address)
+        
+        # Last framebuffer actually sent to each panel (None forces a full flush)
+        self.last_sent = {id(self.display_left): None, id(self.display_right): None}
 
         # Set screen dimensions for drawing canvas (rotated 90 degrees)
         self.screen_width = 64
         self.screen_height = 128
         self.frame_interval = 20
         self.fps_timer = time.time() * 1000
+        self.clock = time.time  # Animation clock; the pack compiler swaps in a simulated one
+        self._alloc_canvases()
         
         # Mood and expression controls
         self.tired = False
@@ -110,6 +169,17 @@ class RoboEyesDual:
         self.eye_r_x_next = self.eye_r_x
         self.eye_r_y_next = self.eye_r_y
         
+        # Time-based tweens driving the geometry above
+        self.tween_l_height = Tween(1, HEIGHT_TWEEN)
+        self.tween_r_height = Tween(1, HEIGHT_TWEEN)
+        self.tween_l_x = Tween(self.eye_l_x, POSITION_TWEEN)
+        self.tween_l_y = Tween(self.eye_l_y, POSITION_TWEEN)
+        self.tween_r_x = Tween(self.eye_r_x, POSITION_TWEEN)
+        self.tween_r_y = Tween(self.eye_r_y, POSITION_TWEEN)
+        self.tween_tired = Tween(0, EYELID_TWEEN)
+        self.tween_angry = Tween(0, EYELID_TWEEN)
+        self.tween_happy = Tween(0, EYELID_TWEEN)
+        
         # Eyelid parameters
         self.eyelids_height_max = self.eye_l_height_default // 2
         self.eyelids_tired_height = 0
@@ -126,6 +196,7 @@ class RoboEyesDual:
         self.h_flicker_amplitude = 2
         self.v_flicker = False
         self.v_flicker_alternate = False
+        self.flicker_phase = False
         self.v_flicker_amplitude = 10
         
         self.autoblinker = False
@@ -150,24 +221,68 @@ class RoboEyesDual:
         
         # Heart animation parameters
         self.heart_animation_angle = 0
-        self.heart_animation_speed = 0.5  # Radians per frame for ~1.5s cycle
+        self.heart_animation_speed = 0.5  # Radians per nominal frame (scaled by elapsed time)
+        self.heart_animation_time = None
         
         # QR code parameters
         self.qr_data = None  # Stores the device ID for QR code
+        self.qr_drawn = None  # (data, size) currently on the panels, skips redraws
         
+        # Render loop state (one thread owns both displays)
+        self.commands = queue.Queue()
+        self.render_thread = None
+        self.render_lock = threading.Lock()
+        self.mood_name = "default"
+        self.pack_player = None  # Plays precompiled frames when a pack is loaded
+        self.gaze_position = 0  # Last look() position; packs only cover the centered gaze
+        self.mood_setups = {
+            "default": self._setup_default,
+            "happy": self._setup_happy,
+            "tired": self._setup_tired,
+            "angry": self._setup_angry,
+            "love": self._setup_love,
+        }
 
     def begin(self, width, height, frame_rate):
         """Initialize RoboEyes with screen parameters"""
         self.screen_width = height
         self.screen_height = width
-        self.display_left.fill(0)
-        self.display_left.show()
-        self.display_right.fill(0)
-        self.display_right.show()
+        self._alloc_canvases()
+        self.clear_displays()
         self.eye_l_height_current = 1
         self.eye_r_height_current = 1
+        self.tween_l_height.set(1)
+        self.tween_r_height.set(1)
         self.set_framerate(frame_rate)
     
+    def _alloc_canvases(self):
+        """Preallocate the portrait drawing canvases and page-layout views of each panel buffer"""
+        size = (self.screen_width, self.screen_height)
+        self.image_left = Image.new('1', size, 0)
+        self.image_right = Image.new('1', size, 0)
+        self.draw_left = ImageDraw.Draw(self.image_left)
+        self.draw_right = ImageDraw.Draw(self.image_right)
+        self.clear_box = [0, 0, self.screen_width, self.screen_height]
+        # Writable (pages, columns) views straight into the driver framebuffers
+        self.pages_left = self._page_view(self.display_left)
+        self.pages_right = self._page_view(self.display_right)
+    
+    def _page_view(self, display):
+        """Return a (pages, width) uint8 view of the panel framebuffer (skips the I2C control byte)"""
+        pages = display.height // 8
+        return np.frombuffer(display.buffer, dtype=np.uint8, count=pages * display.width,
+                             offset=1).reshape(pages, display.width)
+    
+    def _pack_canvas(self, image, pages):
+        """Copy a portrait canvas into the panel page buffer, applying the 90 degree turn
+        
+        Panel column X shows canvas row (height - 1 - X) and panel row Y shows canvas
+        column Y, so each canvas row is one panel column and each packed canvas byte is
+        one page byte with its bits reversed.
+        """
+        rows = np.frombuffer(image.tobytes(), dtype=np.uint8).reshape(self.screen_height, -1)
+        np.take(BIT_REVERSE, rows[::-1].T, out=pages)
+    
     def update(self):
         """Update the display with frame rate limiting"""
         current_time = time.time() * 1000
@@ -368,50 +483,106 @@ class RoboEyesDual:
     
     def _draw_heart(self, draw, x, y, size, fill=255, width_scale=1.0):
         """Draw a filled heart at position x, y with given size and width scaling"""
-        points = []
-        for t in range(0, 628):  # 0 to 2π in steps of 0.01
-            t_rad = t / 100  # Convert to radians
-            x_val = 16 * pow(sin(t_rad), 3)
-            y_val = 16 * cos(t_rad) - 5 * cos(2 * t_rad) - 2 * cos(3 * t_rad) - cos(4 * t_rad)
-            # Apply width scaling for rotation effect
-            scaled_x = x_val * width_scale
-            points.append((x + int(scaled_x * size / 16), y - int(y_val * size / 16)))
-        draw.polygon(points, fill=fill)
+        points = np.empty((len(HEART_X), 2), dtype=np.int32)
+        # Apply width scaling for rotation effect; truncate like int() did
+        points[:, 0] = x + np.trunc(HEART_X * width_scale * size / 16)
+        points[:, 1] = y - np.trunc(HEART_Y * size / 16)
+        # Drop consecutive duplicate vertices (most of the 628 at eye scale)
+        keep = np.ones(len(points), dtype=bool)
+        keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+        draw.polygon(points[keep].ravel().tolist(), fill=fill)
     
     def _draw_qr_code(self, draw, qr_data, x, y, size):
         """Draw a QR code on the given draw object at position x, y with specified size"""
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=size // 21,  # Scale to fit 21x21 QR code within size
-            border=0
-        )
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        qr_img = qr.make_image(fill_color="white", back_color="black").convert('1')
-        # Resize to fit within display
-        qr_img = qr_img.resize((size, size), Image.NEAREST)
-        draw.bitmap((x, y), qr_img, fill=255)
+        draw.bitmap((x, y), render_qr(qr_data, size), fill=255)
+    
+    def _dirty_spans(self, display, frame, last):
+        """Return (page, first_col, last_col) for every page that changed"""
+        width = display.width
+        spans = []
+        for page in range(display.height // 8):
+            start = page * width
+            end = start + width
+            if frame[start:end] == last[start:end]:
+                continue
+            x0 = 0
+            while frame[start + x0] == last[start + x0]:
+                x0 += 1
+            x1 = width - 1
+            while frame[start + x1] == last[start + x1]:
+                x1 -= 1
+            spans.append((page, x0, x1))
+        return spans
+    
+    def _write_span(self, display, frame, page, x0, x1):
+        """Send columns x0..x1 of one page using SSD1306 address windowing"""
+        display.write_cmd(SET_COL_ADDR)
+        display.write_cmd(x0)
+        display.write_cmd(x1)
+        display.write_cmd(SET_PAGE_ADDR)
+        display.write_cmd(page)
+        display.write_cmd(page)
+        start = page * display.width
+        data = bytearray(1 + x1 - x0 + 1)
+        data[0] = 0x40  # Co=0, D/C#=1: data stream
+        data[1:] = frame[start + x0:start + x1 + 1]
+        with display.i2c_device:
+            display.i2c_device.write(data)
+    
+    def flush(self, display):
+        """Push only the changed parts of display's framebuffer to the panel"""
+        frame = bytes(memoryview(display.buffer)[1:])
+        key = id(display)
+        last = self.last_sent.get(key)
+        if last == frame:
+            return 0  # Nothing changed; skip the I2C transfer entirely
+        partial = hasattr(display, "write_spans") or hasattr(display, "i2c_device")
+        if last is None or not partial:
+            display.show()
+            self.last_sent[key] = frame
+            return len(frame)
+        spans = self._dirty_spans(display, frame, last)
+        dirty = sum(x1 - x0 + 1 for _, x0, x1 in spans)
+        if dirty > len(frame) * FULL_FLUSH_RATIO:
+            display.show()
+            dirty = len(frame)
+        elif hasattr(display, "write_spans"):
+            display.write_spans(spans)  # Block-transfer driver: all spans in one transfer
+        else:
+            for page, x0, x1 in spans:
+                self._write_span(display, frame, page, x0, x1)
+        self.last_sent[key] = frame
+        return dirty
     
     def draw_eyes(self):
         """Draw the eyes, hearts, or QR codes on separate displays"""
-        # Create images for drawing
-        image_left = Image.new('1', (self.screen_width, self.screen_height), 0)
-        draw_left = ImageDraw.Draw(image_left)
-        image_right = Image.new('1', (self.screen_width, self.screen_height), 0)
-        draw_right = ImageDraw.Draw(image_right)
-        
+        qr_key = None
         if self.qr and self.qr_data:
+            qr_size = min(self.screen_width, self.screen_height)
+            qr_key = (self.qr_data, qr_size)
+            if self.qr_drawn == qr_key:
+                return  # Static QR already on both panels; nothing to draw or flush
+        self.qr_drawn = None
+        
+        # Reuse the preallocated canvases
+        draw_left = self.draw_left
+        draw_right = self.draw_right
+        draw_left.rectangle(self.clear_box, fill=0)
+        draw_right.rectangle(self.clear_box, fill=0)
+        
+        if qr_key:
             # Draw QR codes centered on both displays
-            qr_size = min(self.screen_width, self.screen_height)   # Leave 5-pixel border
             qr_x = (self.screen_width - qr_size) // 2
             qr_y = (self.screen_height - qr_size) // 2
             self._draw_qr_code(draw_left, self.qr_data, qr_x, qr_y, qr_size)
             self._draw_qr_code(draw_right, self.qr_data, qr_x, qr_y, qr_size)
         
         elif self.love:
-            # Update heart animation angle
-            self.heart_animation_angle = (self.heart_animation_angle + self.heart_animation_speed) % (2 * 3.14159)
+            # Advance heart animation angle by elapsed time (one nominal frame on entry)
+            now = self.clock()
+            frames = 1 if self.heart_animation_time is None else (now - self.heart_animation_time) * 1000 / self.frame_interval
+            self.heart_animation_time = now
+            self.heart_animation_angle = (self.heart_animation_angle + self.heart_animation_speed * frames) % (2 * 3.14159)
             width_scale = abs(cos(self.heart_animation_angle))
             bounce_offset = 10 * sin(self.heart_animation_angle)  # ±5 pixel bounce
             
@@ -425,6 +596,7 @@ class RoboEyesDual:
                            heart_size, fill=255, width_scale=width_scale)
         
         else:
+            now = self.clock()
             if self.curious:
                 if self.eye_l_x < self.eye_l_x_default:
                     self.eye_l_height_offset = 8
@@ -439,8 +611,10 @@ class RoboEyesDual:
                 self.eye_r_height_offset = 0
             
             # Update height with fast transition
-            self.eye_l_height_current = (3 * (self.eye_l_height_next + self.eye_l_height_offset) + self.eye_l_height_current) // 4
-            self.eye_r_height_current = (3 * (self.eye_r_height_next + self.eye_r_height_offset) + self.eye_r_height_current) // 4
+            self.tween_l_height.retarget(self.eye_l_height_next + self.eye_l_height_offset, now)
+            self.tween_r_height.retarget(self.eye_r_height_next + self.eye_r_height_offset, now)
+            self.eye_l_height_current = self.tween_l_height.value(now)
+            self.eye_r_height_current = self.tween_r_height.value(now)
             
             # Adjust y-position with clamped height to prevent excessive shift
             effective_l_height = max(self.eye_l_height_current, 10)
@@ -463,12 +637,15 @@ class RoboEyesDual:
             self.eye_r_border_radius_current = self.eye_r_border_radius_default
             
             # Update position with smoothing
-            self.eye_l_x = (self.eye_l_x + self.eye_l_x_next) // 2
-            self.eye_l_y = (self.eye_l_y + self.eye_l_y_next) // 2
-            self.eye_r_x = (self.eye_r_x + self.eye_r_x_next) // 2
-            self.eye_r_y = (self.eye_r_y + self.eye_r_y_next) // 2
+            for tween, target in ((self.tween_l_x, self.eye_l_x_next), (self.tween_l_y, self.eye_l_y_next),
+                                  (self.tween_r_x, self.eye_r_x_next), (self.tween_r_y, self.eye_r_y_next)):
+                tween.retarget(target, now)
+            self.eye_l_x = self.tween_l_x.value(now)
+            self.eye_l_y = (self.eye_l_y + self.tween_l_y.value(now)) // 2
+            self.eye_r_x = self.tween_r_x.value(now)
+            self.eye_r_y = (self.eye_r_y + self.tween_r_y.value(now)) // 2
             
-            current_time = time.time()
+            current_time = now
             
             # Handle autoblinking
             if self.autoblinker and current_time >= self.blink_timer:
@@ -512,25 +689,29 @@ class RoboEyesDual:
                 
                 self.idle_animation_timer = current_time + self.idle_interval + random.random() * self.idle_interval_variation
             
+            # Flicker alternates every rendered frame; a clock-based period would alias with the frame rate
+            self.flicker_phase = not self.flicker_phase
+            flicker_phase = self.flicker_phase
+            
             # Apply horizontal flicker
             if self.h_flicker:
+                self.h_flicker_alternate = flicker_phase
                 if self.h_flicker_alternate:
                     self.eye_l_x += self.h_flicker_amplitude
                     self.eye_r_x += self.h_flicker_amplitude
                 else:
                     self.eye_l_x -= self.h_flicker_amplitude
                     self.eye_r_x -= self.h_flicker_amplitude
-                self.h_flicker_alternate = not self.h_flicker_alternate
             
             # Apply vertical flicker
             if self.v_flicker:
+                self.v_flicker_alternate = flicker_phase
                 if self.v_flicker_alternate:
                     self.eye_l_y += self.v_flicker_amplitude
                     self.eye_r_y += self.v_flicker_amplitude
                 else:
                     self.eye_l_y -= self.v_flicker_amplitude
                     self.eye_r_y -= self.v_flicker_amplitude
-                self.v_flicker_alternate = not self.v_flicker_alternate
             
             # Draw eyes only if height is sufficient
             if self.eye_l_height_current > 1:
@@ -563,13 +744,16 @@ class RoboEyesDual:
                 self.eyelids_angry_height_next = 0
             
             if self.happy:
-                self.eyelids_happy_bottom_offset_next = self.eye_l_height_current // 1.5 if self.eye_l_height_current > 2 else 0
+                self.eyelids_happy_bottom_offset_next = int(self.eye_l_height_current // 1.5) if self.eye_l_height_current > 2 else 0
             else:
                 self.eyelids_happy_bottom_offset_next = 0
             
-            self.eyelids_tired_height = (self.eyelids_tired_height + self.eyelids_tired_height_next) // 2
-            self.eyelids_angry_height = (self.eyelids_angry_height + self.eyelids_angry_height_next) // 2
-            self.eyelids_happy_bottom_offset = (self.eyelids_happy_bottom_offset + self.eyelids_happy_bottom_offset_next) // 2
+            self.tween_tired.retarget(self.eyelids_tired_height_next, now)
+            self.tween_angry.retarget(self.eyelids_angry_height_next, now)
+            self.tween_happy.retarget(self.eyelids_happy_bottom_offset_next, now)
+            self.eyelids_tired_height = self.tween_tired.value(now)
+            self.eyelids_angry_height = self.tween_angry.value(now)
+            self.eyelids_happy_bottom_offset = self.tween_happy.value(now)
             
             # Draw eyelids
             if self.eyelids_tired_height > 0:
@@ -608,72 +792,59 @@ class RoboEyesDual:
                     self.eye_r_border_radius_default,
                     fill=0)
         
-        # Rotate and display images
-        rotated_left = image_left.rotate(-90, expand=True)
-        rotated_right = image_right.rotate(-90, expand=True)
-        self.display_left.image(rotated_left)
-        self.display_left.show()
-        self.display_right.image(rotated_right)
-        self.display_right.show()
+        # Pack into the native page layout and display
+        self._pack_canvas(self.image_left, self.pages_left)
+        self.flush(self.display_left)
+        self._pack_canvas(self.image_right, self.pages_right)
+        self.flush(self.display_right)
+        self.qr_drawn = qr_key
     
-    def Happy(self, stop_event=None):
-        """Display Happy mood"""
+    def clear_displays(self):
+        """Blank both panels with a full write and reset the delta-flush state"""
+        self.qr_drawn = None
+        for display in (self.display_left, self.display_right):
+            display.fill(0)
+            display.show()
+            self.last_sent[id(display)] = bytes(memoryview(display.buffer)[1:])
+    
+    def _setup_happy(self):
         self.set_mood(HAPPY)
         self.set_position(N)
         self.set_autoblinker(True, 3, 0.5)
         self.set_idle_mode(False)
         self.set_curiosity(False)
         self.anim_laugh()
-        while not (stop_event and stop_event.is_set()):
-            self.update()
-            time.sleep(0.01)
     
-    def Default(self, stop_event=None):
-        """Display Default mood"""
+    def _setup_default(self):
         self.set_mood(DEFAULT)
         self.set_position(0)
         self.set_autoblinker(True, 5, 0.5)
         self.set_idle_mode(True, 2, 2)
         self.set_curiosity(False)
-        while not (stop_event and stop_event.is_set()):
-            self.update()
-            time.sleep(0.01)
     
-    def Tired(self, stop_event=None):
-        """Display Tired mood"""
+    def _setup_tired(self):
         self.set_mood(TIRED)
         self.set_position(S)
         self.set_autoblinker(True, 3, 0.5)
         self.set_idle_mode(False)
         self.set_curiosity(False)
-        while not (stop_event and stop_event.is_set()):
-            self.update()
-            time.sleep(0.01)
     
-    def Angry(self, stop_event=None):
-        """Display Angry mood"""
+    def _setup_angry(self):
         self.set_mood(ANGRY)
         self.set_autoblinker(True, 4, 0.5)
         self.set_idle_mode(False)
         self.set_curiosity(False)
         self.anim_confused()
-        while not (stop_event and stop_event.is_set()):
-            self.update()
-            time.sleep(0.01)
     
-    def Love(self, stop_event=None):
-        """Display Love mood with animated hearts"""
+    def _setup_love(self):
+        self.heart_animation_time = None
         self.set_mood(LOVE)
         self.set_position(0)
         self.set_autoblinker(False)
         self.set_idle_mode(False)
         self.set_curiosity(False)
-        while not (stop_event and stop_event.is_set()):
-            self.update()
-            time.sleep(0.01)
     
-    def QR(self, qr_data, stop_event=None):
-        """Display QR codes encoding the provided data on both eyes"""
+    def _setup_qr(self, qr_data):
         self.qr_data = str(qr_data)  # Use the full input string directly
         if not self.qr_data:
             raise ValueError("QR data is empty")
@@ -681,15 +852,169 @@ class RoboEyesDual:
         self.set_autoblinker(False)
         self.set_idle_mode(False)
         self.set_curiosity(False)
+    
+    def _handle_command(self, command, arg):
+        """Apply one queued command; returns False when the loop should exit"""
+        if command == CMD_STOP:
+            return False
+        if command == CMD_MOOD:
+            self.qr_data = None
+            self.mood_name = arg if arg in self.mood_setups else "default"
+            self.mood_setups[self.mood_name]()
+            if self.pack_player:
+                self.pack_player.start(self.mood_name)
+        elif command == CMD_POSITION:
+            self.gaze_position = arg
+            self.set_position(arg)
+        elif command == CMD_QR:
+            self._setup_qr(arg)
+            self.mood_name = "qr"
+        return True
+    
+    def load_pack(self, path):
+        """Memory-map a compiled mood pack; covered moods are then played back as buffer copies
+        
+        The pack must have been compiled for the panel size and frame rate set by begin().
+        """
+        from display.eye_pack import EyePack, PackPlayer
+        pack = EyePack(path)
+        fps = round(1000 / self.frame_interval)
+        expected = (self.display_left.width, self.display_left.height, fps)
+        if (pack.width, pack.height, pack.fps) != expected:
+            pack.close()
+            raise ValueError(f"{path} was compiled for {pack.width}x{pack.height} at {pack.fps} fps, "
+                             f"the eyes run {expected[0]}x{expected[1]} at {fps} fps")
+        self.pack_player = PackPlayer(pack)
+        self.pack_player.start(self.mood_name)
+    
+    def _gaze_centered(self):
+        """True when no look() offset is active and the eyes have eased back to center"""
+        now = self.clock()
+        return self.gaze_position == 0 and all(
+            tween.done(now) for tween in (self.tween_l_x, self.tween_l_y, self.tween_r_x, self.tween_r_y))
+    
+    def render_frame(self):
+        """Produce one frame, from the loaded pack when it covers the current mood
+        
+        Packs are compiled with centered eyes, so frames are drawn live while a
+        look() position is held and until the eyes are back at center.
+        """
+        if self.pack_player and self.pack_player.covers(self.mood_name) and self._gaze_centered():
+            self.pack_player.step(self)
+        else:
+            self.draw_eyes()
+    
+    def _render_loop(self):
+        """Draw frames on a fixed deadline and apply commands between frames"""
+        interval = self.frame_interval / 1000
+        next_frame = time.monotonic()
+        running = True
+        while running:
+            timeout = next_frame - time.monotonic()
+            try:
+                # Block until the next frame is due or a command arrives
+                command, arg = self.commands.get(timeout=max(0, timeout))
+                try:
+                    running = self._handle_command(command, arg)
+                except Exception as e:
+                    print(f"Eye command {command} failed: {e}")
+                continue
+            except queue.Empty:
+                pass
+            try:
+                self.render_frame()
+            except Exception as e:
+                print(f"Eye render error: {e}")
+            next_frame += interval
+            now = time.monotonic()
+            if next_frame < now:
+                # Fell behind (I2C stall); skip missed frames instead of bursting
+                next_frame = now + interval
+        self.qr_data = None
+        self.clear_displays()
+    
+    def start(self, mood="default"):
+        """Start the persistent render loop (no-op if it is already running)"""
+        with self.render_lock:
+            if self.render_thread and self.render_thread.is_alive():
+                self.show_mood(mood)
+                return
+            self.commands = queue.Queue()
+            self.show_mood(mood)
+            self.render_thread = threading.Thread(target=self._render_loop, daemon=True)
+            self.render_thread.start()
+    
+    def stop(self, timeout=1.0):
+        """Stop the render loop and blank the displays"""
+        with self.render_lock:
+            if self.render_thread is None:
+                return
+            self.commands.put((CMD_STOP, None))
+            self.render_thread.join(timeout=timeout)
+            self.render_thread = None
+    
+    def show_mood(self, mood):
+        """Queue a mood change ("default", "happy", "tired", "angry", "love")"""
+        self.commands.put((CMD_MOOD, mood))
+    
+    def look(self, position):
+        """Queue a predefined eye position (N, NE, ... or 0 for center)"""
+        self.commands.put((CMD_POSITION, position))
+    
+    def show_qr(self, qr_data):
+        """Queue QR display of the given data on both eyes"""
+        if not str(qr_data):
+            raise ValueError("QR data is empty")
+        self.commands.put((CMD_QR, qr_data))
+    
+    def _run_blocking(self, stop_event):
+        """Render with deadline pacing until stop_event is set (legacy blocking API)"""
+        interval = self.frame_interval / 1000
+        next_frame = time.monotonic()
         while not (stop_event and stop_event.is_set()):
-            self.update()
-            time.sleep(0.01)
+            self.draw_eyes()
+            next_frame += interval
+            delay = next_frame - time.monotonic()
+            if delay < 0:
+                next_frame = time.monotonic()
+                continue
+            if stop_event:
+                stop_event.wait(delay)
+            else:
+                time.sleep(delay)
+    
+    def Happy(self, stop_event=None):
+        """Display Happy mood"""
+        self._setup_happy()
+        self._run_blocking(stop_event)
+    
+    def Default(self, stop_event=None):
+        """Display Default mood"""
+        self._setup_default()
+        self._run_blocking(stop_event)
+    
+    def Tired(self, stop_event=None):
+        """Display Tired mood"""
+        self._setup_tired()
+        self._run_blocking(stop_event)
+    
+    def Angry(self, stop_event=None):
+        """Display Angry mood"""
+        self._setup_angry()
+        self._run_blocking(stop_event)
+    
+    def Love(self, stop_event=None):
+        """Display Love mood with animated hearts"""
+        self._setup_love()
+        self._run_blocking(stop_event)
+    
+    def QR(self, qr_data, stop_event=None):
+        """Display QR codes encoding the provided data on both eyes"""
+        self._setup_qr(qr_data)
+        self._run_blocking(stop_event)
         # Clear QR data and displays when stopping
         self.qr_data = None
-        self.display_left.fill(0)
-        self.display_left.show()
-        self.display_right.fill(0)
-        self.display_right.show()
+        self.clear_displays()
 
 if __name__ == "__main__":
     # Create RoboEyes instance
@@ -700,38 +1025,19 @@ if __name__ == "__main__":
     
     # Main loop for testing
     try:
-        # ~ # Test QR mode with a sample 6-digit device ID
-        # ~ stop_event = threading.Event()
-        # ~ qr_thread = threading.Thread(target=eyes.QR, args=(123456, stop_event))
-        # ~ qr_thread.start()
-        # ~ time.sleep(10)  # Display QR for 5 seconds
-        # ~ stop_event.set()
-        # ~ qr_thread.join()
-        
-        # Test other moods
-        moods = [eyes.Default, eyes.Happy, eyes.Tired, eyes.Angry, eyes.Love, eyes.QR]
-        # ~ eyes.QR(-OUukosDkZuvHboo-qX5)
+        # One render loop for the whole run; moods are switched by command
+        eyes.start("default")
         
         # Test QR mode with the user ID
-        stop_event = threading.Event()
-        qr_thread = threading.Thread(target=eyes.QR, args=("-OUukosDkZuvHboo-qX5", stop_event))
-        qr_thread.start()
+        eyes.show_qr("-OUukosDkZuvHboo-qX5")
         time.sleep(10)  # Display QR for 10 seconds
-        stop_event.set()
-        qr_thread.join()
         
-        # ~ eyes.Happy()
-        # ~ for mood in moods:
-            # ~ stop_event = threading.Event()
-            # ~ mood_thread = threading.Thread(target=mood, args=(stop_event,))
-            # ~ mood_thread.start()
-            # ~ time.sleep(3)  # Display each mood for 3 seconds
-            # ~ stop_event.set()
-            # ~ mood_thread.join()
+        for mood in ["default", "happy", "tired", "angry", "love"]:
+            eyes.show_mood(mood)
+            time.sleep(3)  # Display each mood for 3 seconds
+        
+        eyes.stop()
     
     except KeyboardInterrupt:
-        eyes.display_left.fill(0)
-        eyes.display_left.show()
-        eyes.display_right.fill(0)
-        eyes.display_right.show()
+        eyes.stop()
         print("\nRoboEyes stopped")
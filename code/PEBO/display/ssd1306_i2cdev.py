@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+SSD1306 driver that sends whole frames as Linux i2c-dev block transfers
+
+Same image()/fill()/show() surface as adafruit_ssd1306.SSD1306_I2C. The
+difference is that a frame goes out as a single I2C_RDWR ioctl: one message
+carrying all addressing commands as a command stream (control byte 0x00),
+then one message carrying the page data (control byte 0x40). The adafruit
+driver instead sends each command as its own 2-byte transaction.
+write_spans() does the same for the dirty page spans picked by
+RoboEyesDual.flush(), so a partial update is also one ioctl.
+
+The bus is anything with i2c_rdwr(*msgs): an smbus2.SMBus, the shared
+bus client from i2c_bus.py (production), or backends.RecordingI2CBus in
+tests, which records every transfer.
+"""
+
+import numpy as np
+from smbus2 import i2c_msg
+
+# SSD1306 commands
+SET_CONTRAST = 0x81
+SET_ENTIRE_ON = 0xA4
+SET_NORM_INV = 0xA6
+SET_DISP = 0xAE
+SET_MEM_ADDR = 0x20
+SET_COL_ADDR = 0x21
+SET_PAGE_ADDR = 0x22
+SET_DISP_START_LINE = 0x40
+SET_SEG_REMAP = 0xA0
+SET_MUX_RATIO = 0xA8
+SET_IREF_SELECT = 0xAD
+SET_COM_OUT_DIR = 0xC0
+SET_DISP_OFFSET = 0xD3
+SET_COM_PIN_CFG = 0xDA
+SET_DISP_CLK_DIV = 0xD5
+SET_PRECHARGE = 0xD9
+SET_VCOM_DESEL = 0xDB
+SET_CHARGE_PUMP = 0x8D
+
+CONTROL_COMMANDS = 0x00  # Co=0, D/C#=0: rest of the message is commands
+CONTROL_DATA = 0x40      # Co=0, D/C#=1: rest of the message is display data
+MAX_MESSAGES = 42        # I2C_RDWR_IOCTL_MAX_MSGS in the kernel
+
+
+class SSD1306I2CDev:
+    """128x64 (or 128x32) SSD1306 panel driven through i2c_rdwr block transfers"""
+
+    def __init__(self, width, height, bus, addr=0x3C, external_vcc=False, init=True):
+        self.width = width
+        self.height = height
+        self.pages = height // 8
+        self.bus = bus
+        self.addr = addr
+        self.external_vcc = external_vcc
+        # Leading control byte so the whole buffer can be sent as one data message
+        self.buffer = bytearray(self.pages * width + 1)
+        self.buffer[0] = CONTROL_DATA
+        if init:
+            self.init_display()
+
+    def _commands(self, *cmds):
+        return i2c_msg.write(self.addr, bytes((CONTROL_COMMANDS,) + cmds))
+
+    def _transfer(self, msgs):
+        for i in range(0, len(msgs), MAX_MESSAGES):
+            self.bus.i2c_rdwr(*msgs[i:i + MAX_MESSAGES])
+
+    def init_display(self):
+        """Same configuration as the adafruit driver, sent as one command stream"""
+        self._transfer([self._commands(
+            SET_DISP,
+            SET_MEM_ADDR, 0x00,  # Horizontal addressing mode
+            SET_DISP_START_LINE,
+            SET_SEG_REMAP | 0x01,
+            SET_MUX_RATIO, self.height - 1,
+            SET_COM_OUT_DIR | 0x08,
+            SET_DISP_OFFSET, 0x00,
+            SET_COM_PIN_CFG, 0x02 if self.width > 2 * self.height else 0x12,
+            SET_DISP_CLK_DIV, 0x80,
+            SET_PRECHARGE, 0x22 if self.external_vcc else 0xF1,
+            SET_VCOM_DESEL, 0x30,
+            SET_CONTRAST, 0xFF,
+            SET_ENTIRE_ON,
+            SET_NORM_INV,
+            SET_IREF_SELECT, 0x30,
+            SET_CHARGE_PUMP, 0x10 if self.external_vcc else 0x14,
+            SET_DISP | 0x01,
+        )])
+        self.fill(0)
+        self.show()
+
+    def write_cmd(self, cmd):
+        self._transfer([self._commands(cmd)])
+
+    def poweroff(self):
+        self.write_cmd(SET_DISP)
+
+    def poweron(self):
+        self.write_cmd(SET_DISP | 0x01)
+
+    def contrast(self, contrast):
+        self._transfer([self._commands(SET_CONTRAST, contrast)])
+
+    def fill(self, color):
+        self.buffer[1:] = (b"\xff" if color else b"\x00") * (len(self.buffer) - 1)
+
+    def image(self, img):
+        """Copy a 1-bit PIL image of the panel size into the buffer"""
+        pixels = np.asarray(img.convert('1'), dtype=bool)
+        pages = np.packbits(pixels.reshape(self.pages, 8, self.width), axis=1, bitorder='little')
+        self.buffer[1:] = pages.tobytes()
+
+    def show(self):
+        """Send the whole framebuffer: one addressing message and one data message"""
+        self._transfer([
+            self._commands(SET_COL_ADDR, 0, self.width - 1, SET_PAGE_ADDR, 0, self.pages - 1),
+            i2c_msg.write(self.addr, self.buffer),
+        ])
+
+    def write_spans(self, spans):
+        """Send (page, first_col, last_col) spans of the framebuffer in one transfer"""
+        msgs = []
+        for page, x0, x1 in spans:
+            start = 1 + page * self.width
+            data = bytearray(x1 - x0 + 2)
+            data[0] = CONTROL_DATA
+            data[1:] = self.buffer[start + x0:start + x1 + 1]
+            msgs.append(self._commands(SET_COL_ADDR, x0, x1, SET_PAGE_ADDR, page, page))
+            msgs.append(i2c_msg.write(self.addr, data))
+        if msgs:
+            self._transfer(msgs)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Time-based tweening for the eye geometry
+
+Values are evaluated from wall-clock time, not frame count, so an animation
+takes the same time at 20 or 50 fps and dropped frames under load do not slow
+it down. Progress and easing use 16.16 fixed point integers, and results are
+whole pixels, which is what the 1-bit eye drawing needs anyway. A Tween is
+one property that eases from its current value to a new target.
+"""
+
+ONE = 1 << 16
+HALF = 1 << 15
+
+
+def ease_linear(p):
+    return p
+
+
+def ease_out(p):
+    """Quadratic ease-out: fast start, soft landing"""
+    return (p * (2 * ONE - p)) >> 16
+
+
+def ease_in_out(p):
+    """Smoothstep: 3p^2 - 2p^3"""
+    return (p * p * (3 * ONE - 2 * p)) >> 32
+
+
+def progress(elapsed, duration):
+    """Fixed-point 0..ONE progress of elapsed seconds through duration"""
+    if duration <= 0 or elapsed >= duration:
+        return ONE
+    if elapsed <= 0:
+        return 0
+    return int(elapsed * ONE / duration)
+
+
+def lerp(start, end, eased):
+    """Integer interpolation with a fixed-point weight (rounded)"""
+    return start + (((end - start) * eased + HALF) >> 16)
+
+
+class Tween:
+    """One animated integer property; retarget() starts easing from wherever it is now"""
+
+    __slots__ = ("start", "end", "t0", "duration", "easing")
+
+    def __init__(self, value=0, duration=0.1, easing=ease_out):
+        self.start = value
+        self.end = value
+        self.t0 = 0.0
+        self.duration = duration
+        self.easing = easing
+
+    def set(self, value):
+        """Jump straight to value"""
+        self.start = value
+        self.end = value
+
+    def retarget(self, value, now, duration=None):
+        """Ease towards value from the current position (no-op if it is already the target)"""
+        if value == self.end:
+            return
+        self.start = self.value(now)
+        self.end = value
+        self.t0 = now
+        if duration is not None:
+            self.duration = duration
+
+    def value(self, now):
+        if self.start == self.end:
+            return self.end
+        p = progress(now - self.t0, self.duration)
+        if p >= ONE:
+            self.start = self.end
+            return self.end
+        return lerp(self.start, self.end, self.easing(p))
+
+    def done(self, now):
+        return self.value(now) == self.end
+
@@ -2,14 +2,17 @@ import cv2
 import mediapipe as mp
 from picamera2 import Picamera2
 import time
-import board
-import busio
 from adafruit_pca9685 import PCA9685
 from adafruit_motor import servo
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from i2c_bus import get_bus, PRIORITY_SERVO
+from facetracking.neck_controller import PDController, CAMERA_DEG_PER_PX, BODY_KP, BODY_KD
 
 def horizontal_face_centering():
     # Setup I2C and PCA9685 PWM controller
-    i2c = busio.I2C(board.SCL, board.SDA)
+    i2c = get_bus().client("body_servo", PRIORITY_SERVO)
     pwm = PCA9685(i2c)
     pwm.frequency = 50  # Standard servo frequency (50Hz)
     
@@ -46,8 +49,10 @@ def horizontal_face_centering():
     # Minimum face size threshold (as percentage of frame area)
     min_face_area_percent = 3.0  # Adjust this value as needed
     
-    # PID control parameters
-    kp = 0.1  # Proportional gain - adjust as needed
+    # PD control: the camera turns with this servo, so corrections are incremental
+    # and the center zone is the deadband
+    controller = PDController(CAMERA_DEG_PER_PX, kp=BODY_KP, kd=BODY_KD,
+                              deadband=center_zone_width // 2)
     
     # Function to smoothly transition the servo to a target angle
     def set_angle_smooth(servo_obj, current_angle, target_angle, step=2):
@@ -143,19 +148,13 @@ def horizontal_face_centering():
                     # Check if face is centered
                     face_centered = center_zone_left <= face_center_x <= center_zone_right
                     
-                    if not face_centered:
-                        # Calculate error (distance from center)
-                        error = center_x - face_center_x
-                        
-                        # CORRECTED LOGIC: 
-                        # If face is to the left (positive error), servo should move left (increase angle)
-                        # If face is to the right (negative error), servo should move right (decrease angle)
-                        adjustment = kp * error * direction_multiplier
-                        
-                        # Update target angle - DIRECTION CORRECTED
+                    # Error is the distance from center: if face is to the left (positive error),
+                    # servo should move left (increase angle), and right for a negative error
+                    error = center_x - face_center_x
+                    adjustment = controller.update(error, now=current_time) * direction_multiplier
+                    if adjustment:
+                        # Update target angle and keep it within limits
                         target_angle = current_angle + adjustment
-                        
-                        # Ensure angle is within limits
                         target_angle = max(min_angle, min(max_angle, target_angle))
                     
                     # Display centering status
@@ -169,6 +168,7 @@ def horizontal_face_centering():
                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 165, 255), 2)
             
             elif current_time - last_detection_time > face_timeout:
+                controller.reset()
                 # No face detected for a while, return to center
                 if current_angle != 90:
                     target_angle = 90
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Pick the best face crop per capture window for recognition
+
+Saving whatever face is in view every few seconds sends motion-blurred and
+half-turned shots to Rekognition, which then fail its checks. CaptureSelector
+scores every freshly detected face over a window and hands out only the best
+crop when the window closes, or nothing if no candidate passes the gates.
+
+Scores (each 0..1) and their gates:
+  sharpness   variance of the Laplacian of the crop (resized to a fixed size)
+  size        face area relative to the frame
+  frontal     nose position between the eyes from MediaPipe keypoints
+  exposure    mean brightness away from black/white
+
+The candidate score is the product, so one bad property sinks a shot.
+"""
+
+import cv2
+import numpy as np
+
+WINDOW = 5.0             # Seconds per selection window
+CROP_MARGIN = 0.2        # Context kept around the face box
+SCORE_SIZE = (96, 96)    # Crops are scored at a fixed size so sharpness is comparable
+
+SHARPNESS_MIN = 40.0     # Laplacian variance gate ...
+SHARPNESS_GOOD = 200.0   # ... and the value that scores 1.0
+AREA_GOOD = 0.08         # Face area (fraction of the frame) that scores 1.0
+FRONTAL_MIN = 0.5        # 1.0 = nose exactly between the eyes
+YAW_LIMIT = 0.5          # Nose offset (in eye distances) that scores 0
+BRIGHTNESS_RANGE = (40, 220)
+
+# MediaPipe face detection keypoints
+RIGHT_EYE, LEFT_EYE, NOSE_TIP = 0, 1, 2
+
+
+def crop_with_margin(frame, bbox, margin=CROP_MARGIN):
+    x, y, w, h = bbox
+    height, width = frame.shape[:2]
+    mx, my = int(w * margin), int(h * margin)
+    return frame[max(0, y - my):min(height, y + h + my), max(0, x - mx):min(width, x + w + mx)]
+
+
+def frontal_score(detection):
+    """1.0 for a face looking at the camera, falling to 0 as it turns away (None if no keypoints)"""
+    try:
+        keypoints = detection.location_data.relative_keypoints
+        right, left, nose = keypoints[RIGHT_EYE], keypoints[LEFT_EYE], keypoints[NOSE_TIP]
+    except (AttributeError, IndexError):
+        return None
+    eye_distance = abs(left.x - right.x)
+    if eye_distance < 1e-6:
+        return 0.0
+    yaw = abs(nose.x - (left.x + right.x) / 2) / eye_distance
+    return max(0.0, 1.0 - yaw / YAW_LIMIT)
+
+
+def score_face(crop, face, frame_area):
+    """Return (score, parts) for a BGR face crop and its face dict from get_nearest_face()
+    (bbox/area in a frame of frame_area pixels); score 0 if a gate fails"""
+    if crop.size == 0:
+        return 0.0, {}
+    gray = cv2.cvtColor(cv2.resize(crop, SCORE_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+    sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    brightness = float(gray.mean())
+    frontal = frontal_score(face['detection'])
+    parts = {
+        'sharpness': min(1.0, sharpness / SHARPNESS_GOOD),
+        'size': min(1.0, face['area'] / (frame_area * AREA_GOOD)),
+        'frontal': 1.0 if frontal is None else frontal,
+        'exposure': max(0.0, 1.0 - abs(brightness - 128) / 128),
+    }
+    low, high = BRIGHTNESS_RANGE
+    if sharpness < SHARPNESS_MIN or parts['frontal'] < FRONTAL_MIN or not low <= brightness <= high:
+        return 0.0, parts
+    return float(np.prod(list(parts.values()))), parts
+
+
+class CaptureSelector:
+    """Keeps the best-scoring face crop of the current window"""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.window_start = None
+        self.best = None
+        self.best_score = 0.0
+        self.candidates = 0
+        self.emitted = 0
+        self.rejected_windows = 0
+
+    def offer(self, crop, face, frame_area, now):
+        """Score the crop of a freshly detected face (crop_with_margin(), possibly from a
+        higher-resolution frame); only the best crop of the window is kept (copied)"""
+        if self.window_start is None:
+            self.window_start = now
+        self.candidates += 1
+        score, _ = score_face(crop, face, frame_area)
+        if score > self.best_score:
+            self.best_score = score
+            self.best = crop.copy()
+
+    def take(self, now):
+        """When the window has closed, return (crop, score) of its best face or None; starts a new window"""
+        if self.window_start is None or now - self.window_start < self.window:
+            return None
+        best, score = self.best, self.best_score
+        self.window_start = None
+        self.best = None
+        self.best_score = 0.0
+        if best is None:
+            self.rejected_windows += 1
+            return None
+        self.emitted += 1
+        return best, score
+
+    def stats(self):
+        return {
+            "candidates": self.candidates,
+            "emitted": self.emitted,
+            "rejected_windows": self.rejected_windows,
+        }
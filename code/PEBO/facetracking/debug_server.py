@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+On-demand MJPEG debug stream for headless face tracking
+
+Serves the tracker's annotated view on localhost only:
+
+    GET  /         small page with the stream and the key buttons
+    GET  /stream   multipart/x-mixed-replace JPEG stream
+    POST /key/<k>  same as pressing k in the debug window ('+', '-', 'r')
+
+Nothing is drawn or encoded unless a client is watching /stream: each stream
+handler waits on the tracker's result mailbox and only then annotates and
+encodes the newest frame. Reach it from another machine with an SSH tunnel,
+e.g. ssh -L 8080:localhost:8080 pi@pebo.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import cv2
+
+JPEG_QUALITY = 70
+KEYS = ("+", "-", "r")
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>PEBO face tracking</title></head>
+<body style="background:#222;color:#eee;font-family:sans-serif">
+<img src="/stream" width="640" height="480"><br>
+<button onclick="key('-')">- min face</button>
+<button onclick="key('+')">+ min face</button>
+<button onclick="key('r')">reverse center servo</button>
+<script>function key(k){fetch('/key/'+encodeURIComponent(k),{method:'POST'});}</script>
+</body></html>
+"""
+
+
+class DebugStreamServer:
+    """Localhost HTTP server streaming tracker.annotate() output as MJPEG"""
+
+    def __init__(self, tracker, port=8080, host="127.0.0.1"):
+        self.tracker = tracker
+        self.clients = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # Keep the robot's console quiet
+
+            def do_GET(self):
+                if self.path == "/":
+                    body = PAGE.encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/html")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif self.path == "/stream":
+                    server.stream(self)
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                key = unquote(self.path[len("/key/"):]) if self.path.startswith("/key/") else None
+                if key not in KEYS:
+                    self.send_error(404)
+                    return
+                server.tracker.handle_key(ord(key))
+                self.send_response(204)
+                self.end_headers()
+
+        return Handler
+
+    def stream(self, handler):
+        handler.send_response(200)
+        handler.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.end_headers()
+        with self.lock:
+            self.clients += 1
+        seq = 0
+        try:
+            while self.tracker.running:
+                seq, result = self.tracker.results.get(seq, timeout=1.0)
+                if result is None or result[0] is None:
+                    continue  # Frame was skipped before this client connected
+                frame = self.tracker.annotate(result)
+                ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+                if not ok:
+                    continue
+                handler.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: "
+                                    + str(len(jpeg)).encode() + b"\r\n\r\n")
+                handler.wfile.write(jpeg.tobytes())
+                handler.wfile.write(b"\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client went away
+        finally:
+            with self.lock:
+                self.clients -= 1
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="debug-stream", daemon=True)
+        self.thread.start()
+        host, port = self.httpd.server_address[:2]
+        print(f"Debug stream on http://{host}:{port}/")
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
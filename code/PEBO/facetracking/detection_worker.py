@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+MediaPipe face detection in a separate process
+
+Under main_controller.py face detection shares one interpreter (and its GIL)
+with the eye renderer, the assistant's asyncio loop, recognition and audio, so
+every detection burst made the eyes and audio stutter. DetectionWorker runs
+the detector in its own process, on another core:
+
+  frames    the parent copies each RGB frame (any size up to max_shape) into
+            the next slot of a multiprocessing.shared_memory ring (SLOTS
+            frames); a slot is not reused until SLOTS - 1 later requests, so a
+            worker that is still reading after a parent timeout never sees it
+            overwritten
+  requests  (slot, seq, height, width) as 12 bytes over a socketpair
+  results   length-prefixed pickle of (seq, detections); MediaPipe detections
+            are protobuf messages, which pickle compactly
+
+While the parent waits for the result it holds no GIL, so the other threads
+keep running. process() has the same interface as FaceDetection.process().
+
+The worker is started with subprocess (python3 -m facetracking.detection_worker)
+rather than multiprocessing: spawn would re-import main_controller.py, which
+opens the PCA9685 at import, and fork is unsafe with the I2C and audio threads
+already running.
+"""
+
+import argparse
+import os
+import pickle
+import socket
+import struct
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+SLOTS = 4
+TIMEOUT = 1.0          # Seconds to wait for one detection before giving up on it
+RESTART_DELAY = 5.0    # Seconds between attempts to restart a dead worker
+START_TIMEOUT = 30.0   # Loading MediaPipe on a Pi takes a while
+
+REQUEST = struct.Struct("<IIHH")   # slot, seq, height, width
+LENGTH = struct.Struct("<I")
+
+DetectionResult = namedtuple("DetectionResult", "detections")
+
+
+def recv_exact(sock, size):
+    """size bytes from sock, or None on EOF"""
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data.extend(chunk)
+    return bytes(data)
+
+
+def send_message(sock, obj):
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(LENGTH.pack(len(data)) + data)
+
+
+def recv_message(sock):
+    header = recv_exact(sock, LENGTH.size)
+    if header is None:
+        return None
+    data = recv_exact(sock, LENGTH.unpack(header)[0])
+    return None if data is None else pickle.loads(data)
+
+
+def attach_shared_memory(name):
+    """Open the parent's segment without letting this process unlink it at exit"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def slot_view(frames, slot, height, width):
+    """height x width x 3 image view into one slot of the ring"""
+    return frames[slot, :height * width * 3].reshape(height, width, 3)
+
+
+class DetectionWorker:
+    """Parent side: owns the shared frame ring and the worker process"""
+
+    def __init__(self, max_shape, slots=SLOTS, model_selection=0, min_detection_confidence=0.6, timeout=TIMEOUT):
+        self.slot_size = int(np.prod(max_shape))
+        self.slots = slots
+        self.model_selection = model_selection
+        self.min_detection_confidence = min_detection_confidence
+        self.timeout = timeout
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * self.slot_size)
+        self.frames = np.ndarray((slots, self.slot_size), dtype=np.uint8, buffer=self.shm.buf)
+        self.process_handle = None
+        self.sock = None
+        self.seq = 0
+        self.last_start = 0.0
+        self.requests = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.wait_time = 0.0
+
+    def start(self):
+        """Start the worker and wait until its detector is loaded"""
+        self.last_start = time.monotonic()
+        parent_sock, child_sock = socket.socketpair()
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        try:
+            self.process_handle = subprocess.Popen(
+                [sys.executable, "-m", "facetracking.detection_worker",
+                 "--fd", str(child_sock.fileno()), "--shm", self.shm.name, "--slots", str(self.slots),
+                 "--slot-size", str(self.slot_size),
+                 "--model", str(self.model_selection), "--confidence", str(self.min_detection_confidence)],
+                cwd=package_root, pass_fds=(child_sock.fileno(),))
+        finally:
+            child_sock.close()
+        self.sock = parent_sock
+        self.sock.settimeout(START_TIMEOUT)
+        ready = recv_message(self.sock)
+        if ready != "ready":
+            self._stop_process()
+            raise RuntimeError("detection worker did not start")
+        self.sock.settimeout(self.timeout)
+        print(f"Face detection worker running (pid {self.process_handle.pid})")
+
+    def alive(self):
+        return self.process_handle is not None and self.process_handle.poll() is None
+
+    def process(self, frame):
+        """Detect faces in an RGB frame (at most max_shape); DetectionResult(None) on timeout
+        or while the worker is down"""
+        if not self.alive():
+            if time.monotonic() - self.last_start < RESTART_DELAY:
+                return DetectionResult(None)
+            print("Face detection worker died, restarting")
+            self.restarts += 1
+            self._stop_process()
+            try:
+                self.start()
+            except Exception as e:
+                print(f"Could not restart face detection worker: {e}")
+                return DetectionResult(None)
+        self.seq += 1
+        slot = self.seq % self.slots
+        height, width = frame.shape[:2]
+        np.copyto(slot_view(self.frames, slot, height, width), frame)
+        start = time.perf_counter()
+        self.requests += 1
+        try:
+            self.sock.sendall(REQUEST.pack(slot, self.seq & 0xFFFFFFFF, height, width))
+            while True:
+                reply = recv_message(self.sock)
+                if reply is None:
+                    return DetectionResult(None)  # Worker exited; restarted on the next call
+                seq, detections = reply
+                if seq == self.seq & 0xFFFFFFFF:
+                    return DetectionResult(detections)
+                # Late reply to a request that timed out earlier: skip it
+        except socket.timeout:
+            self.timeouts += 1
+            return DetectionResult(None)
+        except OSError:
+            return DetectionResult(None)
+        finally:
+            self.wait_time += time.perf_counter() - start
+
+    def _stop_process(self):
+        if self.sock is not None:
+            self.sock.close()  # EOF ends the worker's loop
+            self.sock = None
+        if self.process_handle is not None:
+            try:
+                self.process_handle.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                self.process_handle.kill()
+                self.process_handle.wait()
+            self.process_handle = None
+
+    def close(self):
+        self._stop_process()
+        del self.frames
+        self.shm.close()
+        self.shm.unlink()
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+            "wait_ms_avg": self.wait_time / self.requests * 1000 if self.requests else 0.0,
+        }
+
+
+def serve(sock, frames, model_selection, min_detection_confidence):
+    """Worker loop: detect on the requested slot until the parent closes the socket"""
+    import mediapipe as mp
+    detector = mp.solutions.face_detection.FaceDetection(
+        model_selection=model_selection,
+        min_detection_confidence=min_detection_confidence
+    )
+    send_message(sock, "ready")
+    while True:
+        request = recv_exact(sock, REQUEST.size)
+        if request is None:
+            break
+        slot, seq, height, width = REQUEST.unpack(request)
+        try:
+            detections = detector.process(slot_view(frames, slot, height, width)).detections
+        except Exception as e:
+            print(f"Face detection worker error: {e}")
+            detections = None
+        send_message(sock, (seq, detections))
+    detector.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Face detection worker (started by DetectionWorker)")
+    parser.add_argument("--fd", type=int, required=True)
+    parser.add_argument("--shm", required=True)
+    parser.add_argument("--slots", type=int, required=True)
+    parser.add_argument("--slot-size", type=int, required=True)
+    parser.add_argument("--model", type=int, default=0)
+    parser.add_argument("--confidence", type=float, default=0.6)
+    args = parser.parse_args()
+
+    sock = socket.socket(fileno=args.fd)
+    shm = attach_shared_memory(args.shm)
+    frames = np.ndarray((args.slots, args.slot_size), dtype=np.uint8, buffer=shm.buf)
+    try:
+        serve(sock, frames, args.model, args.confidence)
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # Parent went away
+    finally:
+        del frames
+        shm.close()
+        sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Face position predictor for the servo threads
+
+Detections describe where the face was when the frame was exposed, and reach
+the servo threads one capture-plus-detection latency later. FacePredictor
+runs a constant-velocity Kalman filter per axis on the face center, keyed by
+capture time. The servo threads ask for the position *now*, which extrapolates
+over the pipeline latency and smooths out detection jitter.
+
+  update(center, capture_time)  feed a measurement (detection thread)
+  predict(now)                  position and velocity at time now, or None if
+                                the last measurement is older than max_age
+
+Times are time.monotonic() seconds. A measurement further than GATE pixels from
+the prediction is taken to be a different face and restarts the filter.
+"""
+
+import threading
+import time
+
+PROCESS_NOISE = 4000.0  # Acceleration noise (px^2/s^3): how quickly the velocity may change
+MEASUREMENT_NOISE = 25.0  # Detection jitter (px^2)
+GATE = 150.0            # Innovation (px) beyond which the filter restarts on the new face
+MAX_AGE = 0.5           # Seconds a prediction stays valid without new measurements
+MAX_HORIZON = 0.25      # Never extrapolate further than this past the last measurement
+LATENCY_SMOOTHING = 0.1
+
+
+class _Axis:
+    """Constant-velocity Kalman filter for one coordinate"""
+
+    __slots__ = ("p", "v", "pp", "pv", "vv")
+
+    def __init__(self, position):
+        self.p = float(position)
+        self.v = 0.0
+        # Covariance [[pp, pv], [pv, vv]]: position known to the detection noise, velocity unknown
+        self.pp = MEASUREMENT_NOISE
+        self.pv = 0.0
+        self.vv = 1e4
+
+    def predict(self, dt):
+        self.p += self.v * dt
+        q = PROCESS_NOISE
+        self.pp += dt * (2 * self.pv + dt * self.vv) + q * dt ** 3 / 3
+        self.pv += dt * self.vv + q * dt ** 2 / 2
+        self.vv += q * dt
+
+    def update(self, z):
+        innovation = z - self.p
+        s = self.pp + MEASUREMENT_NOISE
+        k_p = self.pp / s
+        k_v = self.pv / s
+        self.p += k_p * innovation
+        self.v += k_v * innovation
+        self.vv -= k_v * self.pv
+        self.pv -= k_v * self.pp
+        self.pp -= k_p * self.pp
+        return innovation
+
+    def at(self, dt):
+        return self.p + self.v * dt
+
+
+class FacePredictor:
+    """Thread-safe constant-velocity estimate of the face center"""
+
+    def __init__(self, max_age=MAX_AGE, max_horizon=MAX_HORIZON, gate=GATE):
+        self.max_age = max_age
+        self.max_horizon = max_horizon
+        self.gate = gate
+        self.lock = threading.Lock()
+        self.x = None
+        self.y = None
+        self.last_time = None
+        self.latency = 0.0  # Smoothed capture-to-measurement delay
+        self.updates = 0
+        self.restarts = 0
+
+    def update(self, center, capture_time, now=None):
+        """Feed the face center measured in a frame exposed at capture_time"""
+        now = time.monotonic() if now is None else now
+        cx, cy = center
+        with self.lock:
+            delay = max(0.0, now - capture_time)
+            self.latency += LATENCY_SMOOTHING * (delay - self.latency)
+            self.updates += 1
+            stale = self.last_time is None or capture_time - self.last_time > self.max_age
+            if not stale:
+                dt = max(0.0, capture_time - self.last_time)
+                self.x.predict(dt)
+                self.y.predict(dt)
+                if abs(cx - self.x.p) > self.gate or abs(cy - self.y.p) > self.gate:
+                    stale = True
+                    self.restarts += 1
+            if stale:
+                self.x = _Axis(cx)
+                self.y = _Axis(cy)
+            else:
+                self.x.update(cx)
+                self.y.update(cy)
+            self.last_time = max(capture_time, self.last_time or capture_time)
+
+    def predict(self, now=None):
+        """{'center': (x, y), 'velocity': (vx, vy), 'age': s since the newest frame}
+        at time now, or None if there is no recent face"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            if self.last_time is None or now - self.last_time > self.max_age:
+                return None
+            dt = min(max(0.0, now - self.last_time), self.max_horizon)
+            return {
+                'center': (self.x.at(dt), self.y.at(dt)),
+                'velocity': (self.x.v, self.y.v),
+                'age': now - self.last_time,
+            }
+
+    def reset(self):
+        with self.lock:
+            self.x = self.y = self.last_time = None
+
+    def stats(self):
+        with self.lock:
+            return {
+                "updates": self.updates,
+                "restarts": self.restarts,
+                "latency_ms": self.latency * 1000,
+            }
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Detect-then-track hybrid for the face tracking loop
+
+MediaPipe detection is the expensive part of every iteration. HybridFaceTracker
+lets it run only every N frames: in between, the face picked by
+get_nearest_face() is followed with pyramidal Lucas-Kanade optical flow on the
+small grayscale (lores) image, which costs a few milliseconds.
+
+  - on a detection, corner features inside the face box are picked and tracked
+  - points that fail the forward-backward check are dropped; the box moves by
+    the median point motion and scales by the median change in spread
+  - confidence is the fraction of the original points still tracked well;
+    below LOST_CONFIDENCE the track is dropped and detection runs at once
+  - N grows by one (up to max_interval) each time a detection lands on the
+    tracked box, and falls back to min_interval when it does not
+"""
+
+import cv2
+import numpy as np
+
+MIN_INTERVAL = 2         # Frames between detections when the track is uncertain
+MAX_INTERVAL = 10        # ... and when detections keep agreeing with the track
+AGREE_IOU = 0.5          # Detection and track overlap needed to trust the tracker more
+LOST_CONFIDENCE = 0.5    # Fraction of points that must survive to keep tracking
+MIN_POINTS = 6           # Fewer tracked points than this counts as lost
+FB_ERROR = 1.0           # Max forward-backward error (pixels) for a good point
+
+FEATURE_PARAMS = dict(maxCorners=40, qualityLevel=0.01, minDistance=3, blockSize=5)
+LK_PARAMS = dict(winSize=(15, 15), maxLevel=2,
+                 criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+
+
+def iou(a, b):
+    """Intersection over union of two (x, y, w, h) boxes"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+class HybridFaceTracker:
+    """Decides when to run full detection and tracks the chosen face in between"""
+
+    def __init__(self, scale=1, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL):
+        self.scale = scale  # Full-frame pixels per tracking-image pixel
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.since_detection = 0
+        self.face = None        # Last face dict (full-frame coordinates)
+        self.box = None         # Tracked box in tracking-image coordinates (floats)
+        self.points = None
+        self.initial_points = 0
+        self.prev_gray = None
+        self.confidence = 0.0
+        self.detections = 0
+        self.tracked = 0
+
+    def detection_due(self):
+        return self.box is None or self.since_detection >= self.interval
+
+    def update_detection(self, gray, face):
+        """Feed a fresh detection result (a get_nearest_face() dict or None)"""
+        self.detections += 1
+        self.since_detection = 0
+        if face is None:
+            self.interval = self.min_interval
+            self._drop()
+            return None
+        if self.face is not None and iou(self.face['bbox'], face['bbox']) >= AGREE_IOU:
+            self.interval = min(self.max_interval, self.interval + 1)
+        else:
+            self.interval = self.min_interval
+        x, y, w, h = face['bbox']
+        self.box = np.array([x, y, w, h], dtype=np.float32) / self.scale
+        self.face = dict(face, tracked=False)
+        # gray may be a view into a camera buffer that gets recycled: keep a copy
+        self.prev_gray = gray.copy()
+        self._pick_points(gray)
+        return self.face
+
+    def track(self, gray):
+        """Follow the face into a new frame; returns the face dict or None if the track was lost"""
+        if self.box is None or self.points is None:
+            return None
+        self.since_detection += 1
+        points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, self.points, None, **LK_PARAMS)
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, points, None, **LK_PARAMS)
+        fb_error = np.linalg.norm((self.points - back).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < FB_ERROR)
+        self.confidence = good.sum() / self.initial_points
+        if good.sum() < MIN_POINTS or self.confidence < LOST_CONFIDENCE:
+            self._drop()
+            return None
+
+        old = self.points.reshape(-1, 2)[good]
+        new = points.reshape(-1, 2)[good]
+        dx, dy = np.median(new - old, axis=0)
+        old_spread = np.linalg.norm(old - old.mean(axis=0), axis=1)
+        new_spread = np.linalg.norm(new - new.mean(axis=0), axis=1)
+        valid = old_spread > 1e-3
+        ratio = float(np.median(new_spread[valid] / old_spread[valid])) if valid.any() else 1.0
+
+        x, y, w, h = self.box
+        cx, cy = x + w / 2 + dx, y + h / 2 + dy
+        w, h = w * ratio, h * ratio
+        self.box = np.array([cx - w / 2, cy - h / 2, w, h], dtype=np.float32)
+        self.points = new.reshape(-1, 1, 2)
+        self.prev_gray = gray.copy()
+        self.tracked += 1
+
+        x, y, w, h = (int(round(v * self.scale)) for v in self.box)
+        self.face = {
+            'detection': self.face['detection'],
+            'bbox': (x, y, w, h),
+            'center': (x + w // 2, y + h // 2),
+            'area': w * h,
+            'tracked': True,
+        }
+        return self.face
+
+    def _pick_points(self, gray):
+        x, y, w, h = (int(v) for v in self.box)
+        mask = np.zeros_like(gray)
+        # Inner part of the box: features on the face, not the background around it
+        mask[max(0, y + h // 8):max(0, y + h - h // 8), max(0, x + w // 8):max(0, x + w - w // 8)] = 255
+        self.points = cv2.goodFeaturesToTrack(gray, mask=mask, **FEATURE_PARAMS)
+        if self.points is None or len(self.points) < MIN_POINTS:
+            # Nothing to follow: detect again on the next frame
+            self.points = None
+            self.since_detection = self.interval
+            self.initial_points = 0
+        else:
+            self.initial_points = len(self.points)
+
+    def _drop(self):
+        self.box = None
+        self.points = None
+        self.face = None
+        self.confidence = 0.0
+
+    def stats(self):
+        total = self.detections + self.tracked
+        return {
+            "detections": self.detections,
+            "tracked": self.tracked,
+            "detection_ratio": self.detections / total if total else 0.0,
+            "interval": self.interval,
+        }
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Combined face tracking with photo capture every 5 seconds
-Captures and saves cropped face image as captured.jpg.enc (encrypted) when a person is detected
+Captures and saves the best cropped face image of each 5 s window as captured.jpg.enc (encrypted)
 Resizes captured image by 1.5x and ensures proper servo cleanup
 """
 
@@ -16,7 +16,10 @@ from adafruit_motor import servo
 import threading
 import queue
 import os
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from facetracking.secure_capture import save_encrypted_jpeg, CAPTURE_PATH
+from facetracking.capture_selector import CaptureSelector, crop_with_margin
 import base64
 
 class CombinedFaceTracking:
@@ -83,8 +86,8 @@ class CombinedFaceTracking:
         self.direction_multiplier = 1
         
         # Photo capture parameters
-        self.last_capture_time = time.time()
         self.capture_interval = 5.0
+        self.capture_selector = CaptureSelector(window=self.capture_interval)
 
         # Encryption setup
         aes_key = os.getenv("AES_KEY")
@@ -111,18 +114,11 @@ class CombinedFaceTracking:
         except Exception as e:
             raise ValueError(f"Invalid AES key: {e}")
 
-    def encrypt_image(self, input_path, output_path):
+    def encrypt_image(self, image, output_path=CAPTURE_PATH):
+        """Encode, encrypt and atomically save the captured image (no plaintext on disk)."""
         try:
-            aesgcm = AESGCM(self.key)
-            with open(input_path, 'rb') as f:
-                data = f.read()
-            nonce = os.urandom(12)
-            ciphertext = aesgcm.encrypt(nonce, data, None)
-            with open(output_path, 'wb') as f:
-                f.write(nonce + ciphertext)
-            # ~ print(f"Encrypted {input_path} to {output_path}")
+            save_encrypted_jpeg(image, self.key, output_path)
             print ("********Encrypted********")
-            os.remove(input_path)
         except Exception as e:
             print(f"Encryption error: {e}")
 
@@ -260,24 +256,17 @@ class CombinedFaceTracking:
                 if not self.frame_queue.empty():
                     frame, detections, nearest_face = self.frame_queue.get()
                     current_time = time.time()
-                    if nearest_face and (current_time - self.last_capture_time) >= self.capture_interval:
-                        x, y, w, h = nearest_face['bbox']
-                        margin_x = int(w * 0.2)
-                        margin_y = int(h * 0.2)
-                        x1 = max(0, x - margin_x)
-                        y1 = max(0, y - margin_y)
-                        x2 = min(self.width, x + w + margin_x)
-                        y2 = min(self.height, y + h + margin_y)
-                        cropped_face = frame[y1:y2, x1:x2]
+                    if nearest_face:
+                        self.capture_selector.offer(crop_with_margin(frame, nearest_face['bbox']), nearest_face,
+                                                   self.width * self.height, current_time)
+                    best = self.capture_selector.take(current_time)
+                    if best is not None:
+                        cropped_face, score = best
                         new_width = int(cropped_face.shape[1] * 1.5)
                         new_height = int(cropped_face.shape[0] * 1.5)
                         resized_face = cv2.resize(cropped_face, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
-                        temp_path = '/home/pi/Documents/GitHub/e20-3yp-P-E-BO-Desk-Companion/code/PEBO/temp_captured.jpg'
-                        output_path = '/home/pi/Documents/GitHub/e20-3yp-P-E-BO-Desk-Companion/code/PEBO/captured.jpg.enc'
-                        cv2.imwrite(temp_path, resized_face)
-                        self.encrypt_image(temp_path, output_path)
-                        print(f"Captured and encrypted face at {time.ctime()}")
-                        self.last_capture_time = current_time
+                        self.encrypt_image(resized_face)
+                        print(f"Captured and encrypted face at {time.ctime()} (score {score:.2f})")
                     if nearest_face:
                         x, y, w, h = nearest_face['bbox']
                         cx, cy = nearest_face['center']
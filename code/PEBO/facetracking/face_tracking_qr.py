@@ -4,22 +4,34 @@ Combined face tracking with photo capture and QR code scanning for Wi-Fi connect
 Captures and saves cropped face image as captured.jpg.enc (encrypted) when a person is detected.
 Connects to Wi-Fi from QR code, deletes other profiles except 'preconfigured' if connection succeeds.
 Face tracking continues during and after QR code processing.
+QR scanning is paced by facetracking/qr_scheduler.py rather than run on every frame.
+Wi-Fi provisioning runs on the worker in facetracking/provisioning.py, so joining a
+network never stalls detection or the servos.
+Headless by default when no X display is available (PEBO_HEADLESS=0/1 overrides); the
+annotated view can then be watched through facetracking/debug_server.py (PEBO_DEBUG_PORT).
+Only the best face of each capture window is saved (facetracking/capture_selector.py).
+Frames can be recorded (PEBO_RECORD=<file>) and replayed without camera or servos
+through facetracking/replay.py, which reports the per-stage latency kept in self.latency.
+MediaPipe runs in its own process (facetracking/detection_worker.py) unless
+PEBO_DETECT_PROCESS=0, so detection does not hold the GIL the eyes and audio need.
+With nobody in view, facetracking/motion_gate.py skips detection and slows the camera.
+Faces are detected at two scales (facetracking/roi_detector.py) on a 1280x960 main
+stream; tracking, servo control and display work in 640x480 coordinates.
 """
 
 import cv2
 import mediapipe as mp
-from picamera2 import Picamera2
+try:
+    from picamera2 import Picamera2, MappedArray
+    from libcamera import Transform
+except ImportError:  # No camera stack: only replay (facetracking/replay.py) can run
+    Picamera2 = MappedArray = Transform = None
 import time
-import board
-import busio
 from adafruit_pca9685 import PCA9685
 from adafruit_motor import servo
 import threading
-import queue
 import os
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 import base64
-import pyzbar.pyzbar as pyzbar
 import json
 import subprocess
 import socket
@@ -29,78 +41,124 @@ import numpy as np
 import firebase_admin
 from firebase_admin import credentials
 from firebase_admin import db
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from i2c_bus import get_bus, PRIORITY_SERVO
+from facetracking.secure_capture import save_encrypted_jpeg, CAPTURE_PATH
+from facetracking.qr_scheduler import QRScanScheduler
+from facetracking.face_tracker import HybridFaceTracker
+from facetracking.face_predictor import FacePredictor
+from facetracking.servo_planner import ServoPlanner
+from facetracking import neck_controller as nc
+from facetracking.mailbox import LatestMailbox
+from facetracking.capture_selector import CaptureSelector
+from facetracking.debug_server import DebugStreamServer
+from facetracking.stage_timing import StageTimer
+from facetracking.frame_log import FrameRecorder
+from facetracking.detection_worker import DetectionWorker
+from facetracking.motion_gate import MotionGate
+from facetracking.roi_detector import TwoScaleDetector, ROI, COARSE, COARSE_SIZE, ROI_SIZE
+from facetracking.capture_selector import crop_with_margin
+from facetracking.provisioning import (ProvisioningWorker, CONNECTING, SAVING, REGISTERING)
 
 class CombinedFaceTracking:
     # Fixed name for preconfigured Wi-Fi profile (defined at class level)
     PRECONFIGURED_PROFILE = "preconfigured"
-
-    def __init__(self):
-        # Setup I2C and PCA9685 PWM controller
-        self.i2c = busio.I2C(board.SCL, board.SDA)
-        self.pwm = PCA9685(self.i2c)
-        self.pwm.frequency = 50  # Standard servo frequency (50Hz)
+    TEMP_PROFILE = "temp-qr-wifi"
+
+    def __init__(self, on_provisioning=None, headless=None, debug_port=None, record_path=None,
+                 detect_process=None):
+        # Headless: no annotation and no GUI window (default when there is no X display)
+        if headless is None:
+            headless = os.environ.get("PEBO_HEADLESS", "0" if os.environ.get("DISPLAY") else "1") == "1"
+        self.headless = headless
+        # Optional localhost MJPEG debug stream (annotates only while a client is watching)
+        if debug_port is None and os.environ.get("PEBO_DEBUG_PORT"):
+            debug_port = int(os.environ["PEBO_DEBUG_PORT"])
+        self.debug_port = debug_port
+        self.debug_server = None
+        # Optional frame recording for offline replay (facetracking/replay.py)
+        self.record_path = record_path or os.environ.get("PEBO_RECORD")
+        self.recorder = None
+        # MediaPipe in a worker process (default) or in this one
+        if detect_process is None:
+            detect_process = os.environ.get("PEBO_DETECT_PROCESS", "1") == "1"
+        self.detect_process = detect_process
         
         # Setup servos
         self.h_servo_channel = 7
         self.v_servo_channel = 6
         self.center_servo_channel = 5
+        self.setup_servos()
         
-        self.h_servo = servo.Servo(self.pwm.channels[self.h_servo_channel])
-        self.v_servo = servo.Servo(self.pwm.channels[self.v_servo_channel])
-        self.center_servo = servo.Servo(self.pwm.channels[self.center_servo_channel])
+        # All three move through the planner: the tracking threads only set targets
+        self.servo_planner = ServoPlanner()
+        self.servo_planner.add("h", self.h_servo, 80, max_speed=120, max_accel=600)
+        self.servo_planner.add("v", self.v_servo, 110, max_speed=120, max_accel=600)
+        self.servo_planner.add("center", self.center_servo, 90, max_speed=20, max_accel=100)
         
-        # Initialize camera
-        self.picam2 = Picamera2()
-        self.picam2.configure(self.picam2.create_video_configuration(main={"size": (640, 480)}))
-        self.picam2.start()
+        # Frame dimensions: faces, servos and display use width x height coordinates;
+        # the main stream is capture_scale times larger for ROI detection and face crops
+        self.width, self.height = 640, 480
+        self.capture_scale = 2
+        self.capture_width, self.capture_height = self.width * self.capture_scale, self.height * self.capture_scale
+        self.lores_width, self.lores_height = 320, 240
         
-        # Initialize MediaPipe
-        self.mp_face = mp.solutions.face_detection.FaceDetection(
-            model_selection=0, 
-            min_detection_confidence=0.6
-        )
+        self.setup_camera()
         
-        # Frame dimensions
-        self.width, self.height = 640, 480
+        # Initialize MediaPipe: coarse full-frame passes and high-resolution passes around the last face
+        self.mp_face = self.create_face_detector()
+        self.face_detector = TwoScaleDetector(self.mp_face)
+        
+        # Detection only while there is motion or a face; idle otherwise
+        self.motion_gate = MotionGate()
+        self.frame_rate = None
+        
+        # Full detection every N frames, optical-flow tracking of the chosen face in between
+        self.face_tracker = HybridFaceTracker(scale=self.width // self.lores_width)
+        # Latency-compensated face position for the servo threads
+        self.face_predictor = FacePredictor()
         
-        # Minimum face size threshold
+        # Minimum face size threshold (lower for faces seen in a full-resolution region pass)
         self.min_face_area_percent = 3.0
+        self.roi_min_face_area_percent = 1.0
         
         # Shared variables with locks
         self.face_data_lock = threading.Lock()
-        self.qr_data_lock = threading.Lock()
         self.shared_face_data = None
         self.last_detection_time = time.time()
-        self.qr_processed = False  # Flag to process QR code only once
+        self.qr_scheduler = QRScanScheduler()
+        # Wi-Fi provisioning from QR codes; on_provisioning(job) is called on every state change
+        self.provisioning = ProvisioningWorker([
+            (CONNECTING, self._provision_connect),
+            (SAVING, self._provision_save),
+            (REGISTERING, self._provision_register),
+        ], on_state=on_provisioning)
         
         # Control flags
         self.running = True
-        self.frame_queue = queue.Queue(maxsize=2)
+        # Newest (frame, detections, nearest_face, qr_codes); display, capture and servos wait on it
+        self.results = LatestMailbox()
+        # Per-stage latency (capture, detect, qr, servo, center)
+        self.latency = StageTimer()
         
-        # Dual servo parameters
-        self.h_partition_angles = {1: 110, 2: 105, 3: 100, 4: 80, 5: 60, 6: 55, 7: 50}
-        self.v_partition_angles = {1: 130, 2: 110, 3: 95}
-        self.h_partition_boundaries = [(0, 70, 1), (90, 160, 2), (180, 250, 3), (270, 370, 4),
-                                       (390, 460, 5), (480, 550, 6), (570, 640, 7)]
-        self.v_partition_boundaries = [(0, 120, 1), (170, 290, 2), (340, 480, 3)]
-        
-        self.h_current_angle = 80
-        self.v_current_angle = 100
-        self.h_current_partition = 4
-        self.v_current_partition = 2
+        # Dual servo PD control (absolute: the camera does not move with the neck)
+        self.h_controller = nc.PDController(nc.NECK_H_DEG_PER_PX, kd=nc.NECK_KD)
+        self.v_controller = nc.PDController(nc.NECK_V_DEG_PER_PX, kd=nc.NECK_KD)
+        self.servo_planner.set_target("v", 100)
         
         # Center servo parameters
-        self.center_current_angle = 90
-        self.center_target_angle = 90
         self.center_zone_width = 90
         self.center_zone_left = (self.width // 2) - (self.center_zone_width // 2)
         self.center_zone_right = (self.width // 2) + (self.center_zone_width // 2)
-        self.center_kp = 0.1
+        # Incremental PD: the camera turns with the center servo; the center zone is the deadband
+        self.center_controller = nc.PDController(nc.CAMERA_DEG_PER_PX, kp=nc.BODY_KP, kd=nc.BODY_KD,
+                                                 deadband=self.center_zone_width // 2)
         self.direction_multiplier = 1
         
-        # Photo capture parameters
-        self.last_capture_time = time.time()
+        # Photo capture parameters: the best face of each window is saved
         self.capture_interval = 5.0
+        self.capture_selector = CaptureSelector(window=self.capture_interval)
 
         # Encryption setup
         aes_key = os.getenv("AES_KEY")
@@ -135,6 +193,44 @@ class CombinedFaceTracking:
         # Initialize Firebase
         self.initialize_firebase()
 
+    def setup_servos(self):
+        """PCA9685 on the shared I2C bus and the three servos."""
+        self.i2c = get_bus().client("face_tracking", PRIORITY_SERVO)
+        self.pwm = PCA9685(self.i2c)
+        self.pwm.frequency = 50  # Standard servo frequency (50Hz)
+        self.h_servo = servo.Servo(self.pwm.channels[self.h_servo_channel])
+        self.v_servo = servo.Servo(self.pwm.channels[self.v_servo_channel])
+        self.center_servo = servo.Servo(self.pwm.channels[self.center_servo_channel])
+
+    def setup_camera(self):
+        """Start the camera: frames arrive in RGB order and already rotated."""
+        self.picam2 = Picamera2()
+        self.picam2.configure(self.picam2.create_video_configuration(
+            # "BGR888" is stored R, G, B in memory, which is what MediaPipe wants
+            main={"size": (self.capture_width, self.capture_height), "format": "BGR888"},
+            # Y plane of the lores stream doubles as the grayscale image for the QR pre-check
+            lores={"size": (self.lores_width, self.lores_height), "format": "YUV420"},
+            transform=Transform(hflip=1, vflip=1),  # Camera is mounted upside down
+            buffer_count=4
+        ))
+        self.picam2.start()
+
+    def create_face_detector(self):
+        """MediaPipe face detection, in the worker process when enabled and it starts."""
+        if self.detect_process:
+            max_shape = (max(COARSE_SIZE[1], ROI_SIZE), max(COARSE_SIZE[0], ROI_SIZE), 3)
+            worker = DetectionWorker(max_shape, model_selection=0, min_detection_confidence=0.6)
+            try:
+                worker.start()
+                return worker
+            except Exception as e:
+                print(f"Face detection worker unavailable, detecting in-process: {e}")
+                worker.close()
+        return mp.solutions.face_detection.FaceDetection(
+            model_selection=0, 
+            min_detection_confidence=0.6
+        )
+
     def initialize_firebase(self):
         """Initialize Firebase with the provided service account key."""
         if not firebase_admin._apps:
@@ -187,8 +283,19 @@ class CombinedFaceTracking:
                 'lastUpdated': int(time.time() * 1000)  # Timestamp in milliseconds
             })
             print(f"Stored IP {ip_address or 'Disconnected'} and SSID {ssid or 'Unknown'} for user {user_id}, device {device_id}")
+            return True
         except Exception as e:
             print(f"Error storing data to Firebase: {e}")
+            return False
+
+    def wait_for_ip(self, timeout=10.0, interval=0.5):
+        """Poll for the wlan0 address after a connection change (None on timeout)."""
+        deadline = time.time() + timeout
+        while True:
+            ip_address = self.get_ip_address()
+            if ip_address or time.time() >= deadline:
+                return ip_address
+            time.sleep(interval)
 
     def load_config(self):
         """Load existing configuration from pebo_config.json."""
@@ -337,26 +444,21 @@ class CombinedFaceTracking:
             print(f"Unexpected error during preconfigured Wi-Fi update: {e}")
             return False
 
-    def encrypt_image(self, input_path, output_path):
-        """Encrypt the captured image and save it."""
+    def encrypt_image(self, image, output_path=CAPTURE_PATH):
+        """Encode, encrypt and atomically save the captured image (no plaintext on disk)."""
         try:
-            aesgcm = AESGCM(self.key)
-            with open(input_path, 'rb') as f:
-                data = f.read()
-            nonce = os.urandom(12)
-            ciphertext = aesgcm.encrypt(nonce, data, None)
-            with open(output_path, 'wb') as f:
-                f.write(nonce + ciphertext)
+            save_encrypted_jpeg(image, self.key, output_path)
             print("********Encrypted********")
-            os.remove(input_path)
         except Exception as e:
             print(f"Encryption error: {e}")
 
-    def get_nearest_face(self, detections):
+    def get_nearest_face(self, detections, min_area_percent=None):
         """Find the largest face that meets the minimum area threshold."""
         if not detections:
             return None
-        min_area = (self.width * self.height) * (self.min_face_area_percent / 100.0)
+        if min_area_percent is None:
+            min_area_percent = self.min_face_area_percent
+        min_area = (self.width * self.height) * (min_area_percent / 100.0)
         largest_area = 0
         nearest_face = None
         for detection in detections:
@@ -377,285 +479,399 @@ class CombinedFaceTracking:
         return nearest_face
 
     def process_qr_code(self, qr_data):
-        """Process the QR code data, connect to Wi-Fi, and update preconfigured profile."""
+        """Validate the QR code data and queue a Wi-Fi provisioning job (returns without waiting)."""
         try:
-            with self.qr_data_lock:
-                if self.qr_processed:
-                    return False
-                self.qr_processed = True  # Mark QR as processed
-
-            # Decode JSON data from QR code
-            qr_data = json.loads(qr_data)
-            print(f"Decoded QR code data: {qr_data}")
-
-            # Extract fields
-            ssid = qr_data.get('ssid')
-            password = qr_data.get('password')
-            device_id = qr_data.get('deviceId')
-            user_id = qr_data.get('userId')
-
-            if not all([ssid, password, device_id, user_id]):
-                print("Missing required fields in QR code data")
-                return False
+            config = json.loads(qr_data)
+        except json.JSONDecodeError as e:
+            print(f"Invalid JSON in QR code: {e}")
+            return None
+        print(f"Decoded QR code data: {config}")
 
-            # Log device and user info
-            print(f"Device ID: {device_id}, User ID: {user_id}")
+        if not isinstance(config, dict) or not all(config.get(key) for key in ('ssid', 'password', 'deviceId', 'userId')):
+            print("Missing required fields in QR code data")
+            return None
 
-            # Connect to the new Wi-Fi using a temporary profile
-            temp_profile = "temp-qr-wifi"
-            if not self.connect_to_wifi(ssid, password, temp_profile=temp_profile):
-                print("Failed to connect to new Wi-Fi, remaining on previous network")
-                return False
+        # Log device and user info
+        print(f"Device ID: {config['deviceId']}, User ID: {config['userId']}")
 
-            # Delete all Wi-Fi connections except the preconfigured profile
-            if not self.delete_all_wifi_connections(exclude_profile=self.PRECONFIGURED_PROFILE):
-                print("Failed to delete non-excluded Wi-Fi connections, proceeding anyway")
+        job = self.provisioning.submit(qr_data, config)
+        if job is None:
+            print("Wi-Fi provisioning already in progress, ignoring QR code")
+        return job
 
-            # Delete the temporary profile
-            subprocess.run(['nmcli', 'connection', 'delete', temp_profile], check=False)
-            print(f"Deleted temporary Wi-Fi profile: {temp_profile}")
-
-            # Save updated config to JSON
-            config_data = {
-                "ssid": ssid,
-                "password": password,
-                "deviceId": device_id,
-                "userId": user_id
-            }
-            if not self.save_to_json(config_data):
-                print("Continuing despite failure to save JSON")
-
-            # Update and connect to the preconfigured Wi-Fi
-            if self.update_preconfigured_wifi(ssid, password):
-                print("Preconfigured Wi-Fi updated and connected successfully")
-                # Wait briefly to ensure network is stable
-                time.sleep(5)
-                # Get IP and SSID
-                ip_address = self.get_ip_address()
-                current_ssid = self.get_wifi_ssid()
-                # Store to Firebase
-                self.store_ip_to_firebase(user_id, device_id, ip_address, current_ssid)
-                return True
-            else:
-                print("Failed to update/connect to preconfigured Wi-Fi")
-                return False
+    def _provision_connect(self, job):
+        """Join the new network with a temporary profile and drop the other saved networks."""
+        ssid = job.config['ssid']
+        password = job.config['password']
+        if not self.connect_to_wifi(ssid, password, temp_profile=self.TEMP_PROFILE):
+            job.error = "could not connect to the new Wi-Fi, remaining on previous network"
+            return False
 
-        except json.JSONDecodeError as e:
-            print(f"Invalid JSON in QR code: {e}")
+        # Delete all Wi-Fi connections except the preconfigured profile
+        if not self.delete_all_wifi_connections(exclude_profile=self.PRECONFIGURED_PROFILE):
+            print("Failed to delete non-excluded Wi-Fi connections, proceeding anyway")
+
+        # Delete the temporary profile
+        subprocess.run(['nmcli', 'connection', 'delete', self.TEMP_PROFILE], check=False)
+        print(f"Deleted temporary Wi-Fi profile: {self.TEMP_PROFILE}")
+        return True
+
+    def _provision_save(self, job):
+        """Save the new credentials and IDs to pebo_config.json, then move the preconfigured
+        profile to the new network (the JSON is written whether or not that succeeds)."""
+        config_data = {key: job.config[key] for key in ('ssid', 'password', 'deviceId', 'userId')}
+        if not self.save_to_json(config_data):
+            print("Continuing despite failure to save JSON")
+
+        if not self.update_preconfigured_wifi(job.config['ssid'], job.config['password']):
+            job.error = "could not update/connect to preconfigured Wi-Fi"
             return False
-        except Exception as e:
-            print(f"Error processing QR code: {e}")
+        print("Preconfigured Wi-Fi updated and connected successfully")
+        return True
+
+    def _provision_register(self, job):
+        """Report the new IP address and SSID to Firebase."""
+        ip_address = self.wait_for_ip()
+        current_ssid = self.get_wifi_ssid()
+        job.result.update(ip=ip_address, ssid=current_ssid)
+        if not self.store_ip_to_firebase(job.config['userId'], job.config['deviceId'], ip_address, current_ssid):
+            job.error = "could not register the device in Firebase"
             return False
-        finally:
-            with self.qr_data_lock:
-                self.qr_processed = False  # Reset for next QR scan
+        return True
 
     def face_detection_thread(self):
         """Detect faces and QR codes in frames."""
+        if self.record_path:
+            self.recorder = FrameRecorder(self.record_path)
+            print(f"Recording frames to {self.record_path}")
         while self.running:
             try:
-                frame = self.picam2.capture_array()
-                frame = cv2.resize(frame, (self.width, self.height))
-                frame = cv2.rotate(frame, cv2.ROTATE_180)
-                image_input = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Face detection
-                results = self.mp_face.process(image_input)
-                nearest_face = None
-                if results.detections:
-                    nearest_face = self.get_nearest_face(results.detections)
-                with self.face_data_lock:
-                    self.shared_face_data = nearest_face
-                    if nearest_face:
-                        self.last_detection_time = time.time()
-                
-                # QR code detection
-                gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
-                decoded_objects = pyzbar.decode(gray)
-                qr_data = None
-                if decoded_objects:
-                    qr_data = decoded_objects[0].data.decode('utf-8')
-                    print(f"QR code detected: {qr_data}")
-                    self.process_qr_code(qr_data)
-                
-                # Add frame to queue for display
-                if not self.frame_queue.full():
-                    self.frame_queue.put((frame, results.detections, nearest_face, decoded_objects))
+                start = time.perf_counter()
+                request = self.picam2.capture_request()
+                self.latency.add("capture", time.perf_counter() - start)
+                capture_time = self.capture_time(request)
+                try:
+                    # Views into the capture buffers, valid until the request is released
+                    with MappedArray(request, "main") as main, MappedArray(request, "lores") as lores:
+                        frame = main.array[:self.capture_height, :self.capture_width]
+                        lores_gray = lores.array[:self.lores_height, :self.lores_width]
+                        if self.recorder:
+                            self.recorder.write(capture_time, frame, lores_gray)
+                        self.process_frame(frame, lores_gray, capture_time)
+                finally:
+                    request.release()
                 time.sleep(0.01)
             except Exception as e:
                 print(f"Face/QR detection error: {e}")
                 time.sleep(0.1)
+        if self.recorder:
+            self.recorder.close()
+
+    def process_frame(self, frame, lores_gray, capture_time):
+        """Detect on one RGB frame (capture size) and publish the result to the display, capture and servo threads."""
+        with self.face_data_lock:
+            face_present = self.shared_face_data is not None
+        if self.motion_gate.update(lores_gray, time.time(), face_present):
+            detections, nearest_face, decoded_objects = self.detect(frame, lores_gray, capture_time)
+        else:
+            detections, nearest_face, decoded_objects = None, None, []
+        self.set_frame_rate(self.motion_gate.fps())
+        # Consumers outlive the camera buffer, so the ones that look at pixels get their own
+        # (BGR) copy: capture candidates a full-resolution face crop, the display and debug
+        # stream a width x height frame, made only while someone is watching
+        if self.is_capture_candidate(nearest_face):
+            nearest_face['crop'] = self.face_crop(frame, nearest_face)
+        image = None
+        if self.frame_wanted():
+            image = cv2.cvtColor(self.display_frame(frame), cv2.COLOR_RGB2BGR)
+        self.results.put((image, detections, nearest_face, decoded_objects))
+
+    def set_frame_rate(self, fps):
+        """Change the camera frame rate (idle/active), only when it differs from the current one."""
+        if fps == self.frame_rate:
+            return
+        self.frame_rate = fps
+        frame_us = int(1e6 / fps)
+        try:
+            self.picam2.set_controls({"FrameDurationLimits": (frame_us, frame_us)})
+        except Exception as e:
+            print(f"Could not set camera frame rate: {e}")
+
+    def frame_wanted(self):
+        """True if the display or a debug stream client will use the pixels of the next result."""
+        return not self.headless or (self.debug_server is not None and self.debug_server.clients > 0)
+
+    def display_frame(self, frame):
+        """frame at width x height."""
+        if frame.shape[1] == self.width:
+            return frame
+        return cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
+
+    def face_crop(self, frame, face):
+        """BGR crop (with margin) of a face from the capture-size frame, at least 1.5x the
+        width x height scale that recognition was tuned on."""
+        scale = frame.shape[1] / self.width
+        bbox = tuple(int(v * scale) for v in face['bbox'])
+        crop = cv2.cvtColor(crop_with_margin(frame, bbox), cv2.COLOR_RGB2BGR)
+        if scale < 1.5:  # e.g. replaying a width x height recording
+            crop = cv2.resize(crop, None, fx=1.5 / scale, fy=1.5 / scale, interpolation=cv2.INTER_LINEAR)
+        return crop
+
+    def relative_box(self, face):
+        """A face's bbox as relative (xmin, ymin, width, height)."""
+        x, y, w, h = face['bbox']
+        return x / self.width, y / self.height, w / self.width, h / self.height
+
+    @staticmethod
+    def is_capture_candidate(face):
+        """Only MediaPipe detections are scored; tracked faces carry stale keypoints."""
+        return bool(face) and not face.get('tracked')
+
+    def capture_time(self, request):
+        """Monotonic time the frame was exposed, from the sensor timestamp when it is usable."""
+        now = time.monotonic()
+        try:
+            sensor_ns = request.get_metadata().get("SensorTimestamp")
+        except Exception:
+            sensor_ns = None
+        if sensor_ns:
+            exposed = sensor_ns / 1e9
+            if 0 <= now - exposed < 1.0:
+                return exposed
+        return now
+
+    def detect(self, frame, lores_gray=None, capture_time=None):
+        """Run face detection or tracking and (when scheduled) QR scanning on one RGB frame."""
+        if lores_gray is None:
+            lores_gray = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY),
+                                    (self.lores_width, self.lores_height), interpolation=cv2.INTER_AREA)
+        # Follow the current face between detections; detect when due or when the track is lost
+        start = time.perf_counter()
+        detections = None
+        nearest_face = None
+        if not self.face_tracker.detection_due():
+            nearest_face = self.face_tracker.track(lores_gray)
+        if nearest_face is None:
+            with self.face_data_lock:
+                last_face = self.shared_face_data
+            detections, detection_pass = self.face_detector.detect(
+                frame, self.relative_box(last_face) if last_face else None)
+            if detections:
+                nearest_face = self.get_nearest_face(
+                    detections, self.roi_min_face_area_percent if detection_pass == ROI else None)
+                if nearest_face is None and detection_pass == COARSE:
+                    # Too small to accept from the coarse pass: accept it if a pass at full resolution agrees
+                    small_face = self.get_nearest_face(detections, self.roi_min_face_area_percent)
+                    if small_face:
+                        confirmed = self.face_detector.detect_region(frame, self.relative_box(small_face))
+                        if confirmed:
+                            detections = confirmed
+                            nearest_face = self.get_nearest_face(confirmed, self.roi_min_face_area_percent)
+            nearest_face = self.face_tracker.update_detection(lores_gray, nearest_face)
+        self.latency.add("detect", time.perf_counter() - start)
+        with self.face_data_lock:
+            self.shared_face_data = nearest_face
+            if nearest_face:
+                self.last_detection_time = time.time()
+        if nearest_face:
+            self.face_predictor.update(nearest_face['center'],
+                                       time.monotonic() if capture_time is None else capture_time)
+        
+        # QR code detection, only on frames the scheduler picks
+        decoded_objects = []
+        now = time.time()
+        if self.qr_scheduler.due(now, face_tracked=nearest_face is not None):
+            start = time.perf_counter()
+            # Decode at width x height: a code held up to the camera needs no more pixels,
+            # and the results come back in display coordinates
+            decoded_objects, new_payloads = self.qr_scheduler.scan(frame, now, lores=lores_gray,
+                                                                   scale=self.width / frame.shape[1])
+            self.latency.add("qr", time.perf_counter() - start)
+            for qr_data in new_payloads:
+                print(f"QR code detected: {qr_data}")
+                self.process_qr_code(qr_data)
+        return detections, nearest_face, decoded_objects
+
+    @property
+    def h_current_angle(self):
+        return self.servo_planner.position("h")
+
+    @property
+    def v_current_angle(self):
+        return self.servo_planner.position("v")
+
+    @property
+    def center_current_angle(self):
+        return self.servo_planner.position("center")
+
+    @property
+    def center_target_angle(self):
+        return self.servo_planner.target("center")
 
     def dual_servo_thread(self):
-        """Control dual servos for face tracking."""
+        """PD control of the dual servos from the face error (the planner moves the servos)."""
         face_timeout = 2.0
-        def set_angle_smooth_fast(servo_obj, current_angle, target_angle, step=2):
-            if current_angle == target_angle:
-                return current_angle
-            direction = 1 if target_angle > current_angle else -1
-            for angle in range(current_angle, target_angle + direction, direction):
-                servo_obj.angle = angle
-                time.sleep(0.01)
-            servo_obj.angle = target_angle
-            time.sleep(0.01)
-            return target_angle
-        def get_partition(position, boundaries):
-            for start, end, partition in boundaries:
-                if start <= position <= end:
-                    return partition, False
-            return None, True
-        self.h_current_angle = set_angle_smooth_fast(self.h_servo, 80, self.h_current_angle)
-        self.v_current_angle = set_angle_smooth_fast(self.v_servo, 110, self.v_current_angle)
+        seq = 0
+        fresh = False
         while self.running:
             try:
                 current_time = time.time()
                 with self.face_data_lock:
-                    face_data = self.shared_face_data
                     last_detection = self.last_detection_time
+                face_data = self.face_predictor.predict()
                 if face_data:
                     cx, cy = face_data['center']
-                    h_partition, h_in_gap = get_partition(cx, self.h_partition_boundaries)
-                    v_partition, v_in_gap = get_partition(cy, self.v_partition_boundaries)
-                    if not h_in_gap and h_partition != self.h_current_partition:
-                        h_target_angle = self.h_partition_angles[h_partition]
-                        self.h_current_angle = set_angle_smooth_fast(self.h_servo, self.h_current_angle, h_target_angle)
-                        self.h_current_partition = h_partition
-                    if not v_in_gap and v_partition != self.v_current_partition:
-                        v_target_angle = self.v_partition_angles[v_partition]
-                        self.v_current_angle = set_angle_smooth_fast(self.v_servo, self.v_current_angle, v_target_angle)
-                        self.v_current_partition = v_partition
+                    vx, vy = face_data['velocity']
+                    # Error is positive when the face is left of / above the center
+                    h_target = nc.NECK_H_NEUTRAL + self.h_controller.update(self.width / 2 - cx, -vx)
+                    v_target = nc.NECK_V_NEUTRAL + self.v_controller.update(self.height / 2 - cy, -vy)
+                    if abs(h_target - self.servo_planner.target("h")) >= nc.NECK_DEADBAND:
+                        self.servo_planner.set_target("h", h_target)
+                    if abs(v_target - self.servo_planner.target("v")) >= nc.NECK_DEADBAND:
+                        self.servo_planner.set_target("v", v_target)
+                    if fresh:
+                        self.latency.add("servo", face_data['age'])
                 elif current_time - last_detection > face_timeout:
-                    if self.h_current_angle != 80 or self.v_current_angle != 110:
-                        self.h_current_angle = set_angle_smooth_fast(self.h_servo, self.h_current_angle, 80)
-                        self.v_current_angle = set_angle_smooth_fast(self.v_servo, self.v_current_angle, 110)
-                        self.h_current_partition = 4
-                        self.v_current_partition = 2
-                time.sleep(0.01)
+                    self.servo_planner.set_target("h", nc.NECK_H_NEUTRAL)
+                    self.servo_planner.set_target("v", nc.NECK_V_NEUTRAL)
+                # Run again on the next detection result, or after one control period
+                seq, result = self.results.get(seq, timeout=0.02)
+                fresh = result is not None
             except Exception as e:
                 print(f"Dual servo error: {e}")
                 time.sleep(0.1)
 
     def center_servo_thread(self):
-        """Control center servo for fine face tracking."""
+        """PD control of the center servo for fine face tracking (the planner moves the servo)."""
         face_timeout = 5.0
-        def set_angle_smooth_slow(servo_obj, current_angle, target_angle, step=2):
-            if abs(current_angle - target_angle) < step:
-                servo_obj.angle = target_angle
-                return target_angle
-            direction = 1 if target_angle > current_angle else -1
-            new_angle = current_angle + (direction * step)
-            servo_obj.angle = new_angle
-            return new_angle
-        self.center_servo.angle = self.center_current_angle
+        seq = 0
+        fresh = False
         while self.running:
             try:
                 current_time = time.time()
                 with self.face_data_lock:
-                    face_data = self.shared_face_data
                     last_detection = self.last_detection_time
+                face_data = self.face_predictor.predict()
                 if face_data:
                     face_center_x, _ = face_data['center']
-                    center_x = self.width // 2
-                    face_centered = self.center_zone_left <= face_center_x <= self.center_zone_right
-                    if not face_centered:
-                        error = center_x - face_center_x
-                        adjustment = self.center_kp * error * self.direction_multiplier
-                        self.center_target_angle = self.center_current_angle + adjustment
-                        self.center_target_angle = max(0, min(180, self.center_target_angle))
+                    vx, _ = face_data['velocity']
+                    adjustment = self.center_controller.update(self.width / 2 - face_center_x, -vx)
+                    if adjustment:
+                        self.servo_planner.set_target(
+                            "center", self.center_current_angle + adjustment * self.direction_multiplier)
+                    if fresh:
+                        self.latency.add("center", face_data['age'])
                 elif current_time - last_detection > face_timeout:
-                    self.center_target_angle = 90
-                if self.center_current_angle != self.center_target_angle:
-                    self.center_current_angle = set_angle_smooth_slow(
-                        self.center_servo, self.center_current_angle, self.center_target_angle
-                    )
-                time.sleep(0.1)
+                    self.servo_planner.set_target("center", 90)
+                seq, result = self.results.get(seq, timeout=0.1)
+                fresh = result is not None
             except Exception as e:
                 print(f"Center servo error: {e}")
                 time.sleep(0.1)
 
+    def capture_thread(self):
+        """Offer every fresh detection to the capture selector and encrypt the best face of each window."""
+        seq = 0
+        while self.running:
+            try:
+                seq, result = self.results.get(seq, timeout=0.5)
+                now = time.time()
+                if result is not None:
+                    _, _, nearest_face, _ = result
+                    if self.is_capture_candidate(nearest_face) and 'crop' in nearest_face:
+                        self.capture_selector.offer(nearest_face['crop'], nearest_face,
+                                                    self.width * self.height, now)
+                best = self.capture_selector.take(now)
+                if best is not None:
+                    cropped_face, score = best
+                    self.encrypt_image(cropped_face)
+                    print(f"Captured and encrypted face at {time.ctime()} (score {score:.2f})")
+            except Exception as e:
+                print(f"Capture error: {e}")
+                time.sleep(0.1)
+
+    def annotate(self, result):
+        """Return a copy of the result's frame with face, QR and servo annotations drawn on it."""
+        frame, detections, nearest_face, qr_codes = result
+        frame = frame.copy()  # Annotations must not end up in the capture thread's crops
+        if nearest_face:
+            x, y, w, h = nearest_face['bbox']
+            cx, cy = nearest_face['center']
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+            cv2.circle(frame, (cx, cy), 5, (0, 0, 255), -1)
+            area_text = f"Area: {nearest_face['area']:.0f}px²"
+            cv2.putText(frame, area_text, (x, y - 10), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+            face_centered = self.center_zone_left <= cx <= self.center_zone_right
+            status_text = "CENTERED" if face_centered else "NOT CENTERED"
+            if nearest_face.get('tracked'):
+                status_text += " (tracked)"
+            status_color = (0, 255, 0) if face_centered else (0, 0, 255)
+            cv2.putText(frame, status_text, (10, 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, status_color, 2)
+            if detections:
+                for detection in detections:
+                    if detection != nearest_face['detection']:
+                        bbox = detection.location_data.relative_bounding_box
+                        other_x = int(bbox.xmin * self.width)
+                        other_y = int(bbox.ymin * self.height)
+                        other_w = int(bbox.width * self.width)
+                        other_h = int(bbox.height * self.height)
+                        cv2.rectangle(frame, (other_x, other_y), 
+                                    (other_x + other_w, other_y + other_h), 
+                                    (0, 0, 255), 1)
+        else:
+            cv2.putText(frame, "No qualifying faces", (10, 70),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 165, 255), 2)
+        # Draw QR code rectangles
+        for qr in qr_codes:
+            points = qr.polygon
+            if len(points) >= 4:
+                pts = [(point.x, point.y) for point in points]
+                cv2.polylines(frame, [np.array(pts, dtype=np.int32)], True, (255, 255, 0), 3)
+        cv2.putText(frame, f"Dual H: {self.h_current_angle:.0f}° -> {self.servo_planner.target('h'):.0f}°",
+                    (self.width - 300, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
+        cv2.putText(frame, f"Dual V: {self.v_current_angle:.0f}° -> {self.servo_planner.target('v'):.0f}°",
+                    (self.width - 300, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
+        cv2.putText(frame, f"Center: {self.center_current_angle:.1f}°",
+                    (self.width - 200, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
+        direction_text = "Normal" if self.direction_multiplier == 1 else "Reversed"
+        cv2.putText(frame, f"Direction: {direction_text}",
+                    (self.width - 200, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
+        job = self.provisioning.status()
+        if job:
+            cv2.putText(frame, f"Wi-Fi: {job.state}", (10, 100),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+        cv2.putText(frame, "Combined Face Tracking & QR", (self.width//2 - 150, self.height - 20),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        return frame
+
+    def handle_key(self, key):
+        """Debug controls: + / - min face area, r reverses the center servo. Returns False to quit."""
+        if key == 27:
+            self.running = False
+            return False
+        elif key == ord('+'):
+            self.min_face_area_percent += 0.5
+            print(f"Min face area: {self.min_face_area_percent:.1f}%")
+        elif key == ord('-'):
+            self.min_face_area_percent = max(0.5, self.min_face_area_percent - 0.5)
+            print(f"Min face area: {self.min_face_area_percent:.1f}%")
+        elif key == ord('r'):
+            self.direction_multiplier *= -1
+            print(f"Center servo direction: {'Normal' if self.direction_multiplier == 1 else 'Reversed'}")
+        return True
+
     def display_thread(self):
-        """Display frames with face and QR code annotations."""
+        """Display annotated frames in a window (not started in headless mode)."""
+        seq = 0
         while self.running:
             try:
-                if not self.frame_queue.empty():
-                    frame, detections, nearest_face, qr_codes = self.frame_queue.get()
-                    current_time = time.time()
-                    if nearest_face and (current_time - self.last_capture_time) >= self.capture_interval:
-                        x, y, w, h = nearest_face['bbox']
-                        margin_x = int(w * 0.2)
-                        margin_y = int(h * 0.2)
-                        x1 = max(0, x - margin_x)
-                        y1 = max(0, y - margin_y)
-                        x2 = min(self.width, x + w + margin_x)
-                        y2 = min(self.height, y + h + margin_y)
-                        cropped_face = frame[y1:y2, x1:x2]
-                        new_width = int(cropped_face.shape[1] * 1.5)
-                        new_height = int(cropped_face.shape[0] * 1.5)
-                        resized_face = cv2.resize(cropped_face, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
-                        temp_path = '/home/pi/Documents/GitHub/e20-3yp-P-E-BO-Desk-Companion/code/PEBO/temp_captured.jpg'
-                        output_path = '/home/pi/Documents/GitHub/e20-3yp-P-E-BO-Desk-Companion/code/PEBO/captured.jpg.enc'
-                        cv2.imwrite(temp_path, resized_face)
-                        self.encrypt_image(temp_path, output_path)
-                        print(f"Captured and encrypted face at {time.ctime()}")
-                        self.last_capture_time = current_time
-                    if nearest_face:
-                        x, y, w, h = nearest_face['bbox']
-                        cx, cy = nearest_face['center']
-                        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                        cv2.circle(frame, (cx, cy), 5, (0, 0, 255), -1)
-                        area_text = f"Area: {nearest_face['area']:.0f}px²"
-                        cv2.putText(frame, area_text, (x, y - 10), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-                        face_centered = self.center_zone_left <= cx <= self.center_zone_right
-                        status_text = "CENTERED" if face_centered else "NOT CENTERED"
-                        status_color = (0, 255, 0) if face_centered else (0, 0, 255)
-                        cv2.putText(frame, status_text, (10, 30),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, status_color, 2)
-                        if detections:
-                            for detection in detections:
-                                if detection != nearest_face['detection']:
-                                    bbox = detection.location_data.relative_bounding_box
-                                    other_x = int(bbox.xmin * self.width)
-                                    other_y = int(bbox.ymin * self.height)
-                                    other_w = int(bbox.width * self.width)
-                                    other_h = int(bbox.height * self.height)
-                                    cv2.rectangle(frame, (other_x, other_y), 
-                                                (other_x + other_w, other_y + other_h), 
-                                                (0, 0, 255), 1)
-                    else:
-                        cv2.putText(frame, "No qualifying faces", (10, 70),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 165, 255), 2)
-                    # Draw QR code rectangles
-                    for qr in qr_codes:
-                        points = qr.polygon
-                        if len(points) >= 4:
-                            pts = [(point.x, point.y) for point in points]
-                            cv2.polylines(frame, [np.array(pts, dtype=np.int32)], True, (255, 255, 0), 3)
-                    cv2.putText(frame, f"Dual H: {self.h_current_angle}°, P: {self.h_current_partition}",
-                                (self.width - 300, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
-                    cv2.putText(frame, f"Dual V: {self.v_current_angle}°, P: {self.v_current_partition}",
-                                (self.width - 300, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
-                    cv2.putText(frame, f"Center: {self.center_current_angle:.1f}°",
-                                (self.width - 200, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
-                    direction_text = "Normal" if self.direction_multiplier == 1 else "Reversed"
-                    cv2.putText(frame, f"Direction: {direction_text}",
-                                (self.width - 200, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
-                    cv2.putText(frame, "Combined Face Tracking & QR", (self.width//2 - 150, self.height - 20),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-                    cv2.imshow("Combined Face Tracking & QR", frame)
-                    key = cv2.waitKey(1) & 0xFF
-                    if key == 27:
-                        self.running = False
+                seq, result = self.results.get(seq, timeout=0.5)
+                if result is not None and result[0] is not None:
+                    cv2.imshow("Combined Face Tracking & QR", self.annotate(result))
+                    if not self.handle_key(cv2.waitKey(1) & 0xFF):
                         break
-                    elif key == ord('+'):
-                        self.min_face_area_percent += 0.5
-                        print(f"Min face area: {self.min_face_area_percent:.1f}%")
-                    elif key == ord('-'):
-                        self.min_face_area_percent = max(0.5, self.min_face_area_percent - 0.5)
-                        print(f"Min face area: {self.min_face_area_percent:.1f}%")
-                    elif key == ord('r'):
-                        self.direction_multiplier *= -1
-                time.sleep(0.03)
             except Exception as e:
                 print(f"Display error: {e}")
                 time.sleep(0.1)
@@ -672,17 +888,12 @@ class CombinedFaceTracking:
         """Clean up servos, camera, and Firebase."""
         print("Returning servos to safe positions...")
         try:
-            def set_angle_smooth(servo_obj, current_angle, target_angle, step=2):
-                if current_angle == target_angle:
-                    return
-                direction = 1 if target_angle > current_angle else -1
-                for angle in range(current_angle, target_angle + direction, direction):
-                    servo_obj.angle = angle
-                    time.sleep(0.02)
-                servo_obj.angle = target_angle
-            set_angle_smooth(self.h_servo, int(self.h_current_angle), 80)
-            set_angle_smooth(self.v_servo, int(self.v_current_angle), 110)
-            set_angle_smooth(self.center_servo, int(self.center_current_angle), 90)
+            self.servo_planner.set_target("h", nc.NECK_H_NEUTRAL)
+            self.servo_planner.set_target("v", nc.NECK_V_NEUTRAL)
+            self.servo_planner.set_target("center", 90)
+            self.servo_planner.start()  # In case cleanup runs before run() started it
+            self.servo_planner.wait(timeout=5.0)
+            self.servo_planner.stop()
             time.sleep(1.0)
             self.stop_servo(self.h_servo_channel)
             self.stop_servo(self.v_servo_channel)
@@ -696,7 +907,10 @@ class CombinedFaceTracking:
         except Exception as e:
             print(f"Error de-initializing PWM/I2C: {e}")
         try:
-            cv2.destroyAllWindows()
+            if self.debug_server:
+                self.debug_server.stop()
+            if not self.headless:
+                cv2.destroyAllWindows()
             self.picam2.stop()
             print("Camera and display cleaned up")
         except Exception as e:
@@ -707,24 +921,50 @@ class CombinedFaceTracking:
                 print("Firebase app cleaned up")
         except Exception as e:
             print(f"Error cleaning up Firebase app: {e}")
+        self.provisioning.stop()
+        try:
+            self.mp_face.close()
+        except Exception as e:
+            print(f"Error closing face detector: {e}")
+        if isinstance(self.mp_face, DetectionWorker):
+            print(f"Detection worker: {self.mp_face.stats()}")
+        print(f"QR scanning: {self.qr_scheduler.stats()}")
+        print(f"Face tracking: {self.face_tracker.stats()}")
+        print(f"Face detection passes: {self.face_detector.stats()}")
+        print(f"Face prediction: {self.face_predictor.stats()}")
+        print(f"Face capture: {self.capture_selector.stats()}")
+        print(f"Motion gate: {self.motion_gate.stats()}")
+        print(f"Pipeline latency ({self.latency.fps():.1f} fps):\n{self.latency.report()}")
         print("Cleanup complete")
 
     def run(self):
         """Start all threads for face tracking and QR scanning."""
+        self.servo_planner.start()
         threads = [
             threading.Thread(target=self.face_detection_thread, daemon=True),
             threading.Thread(target=self.dual_servo_thread, daemon=True),
             threading.Thread(target=self.center_servo_thread, daemon=True),
-            threading.Thread(target=self.display_thread, daemon=True)
+            threading.Thread(target=self.capture_thread, daemon=True)
         ]
+        if not self.headless:
+            threads.append(threading.Thread(target=self.display_thread, daemon=True))
         for thread in threads:
             thread.start()
+        if self.debug_port:
+            try:
+                self.debug_server = DebugStreamServer(self, self.debug_port)
+                self.debug_server.start()
+            except OSError as e:
+                print(f"Could not start debug stream on port {self.debug_port}: {e}")
         try:
-            threads[3].join()
+            # Runs until ESC in the debug window or Ctrl+C
+            while self.running:
+                time.sleep(0.5)
         except KeyboardInterrupt:
             print("Program interrupted by user")
         finally:
             self.running = False
+            self.results.close()
             self.cleanup()
 
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Compact recording of camera frames for offline replay
+
+File layout: MAGIC, then one record per frame
+
+    <d I I>  capture time (monotonic s), main JPEG length, lores JPEG length
+    main     JPEG of the main stream (bytes in camera order, RGB; 1280x960)
+    lores    JPEG of the lores Y plane (grayscale)
+
+At quality 90 a 1280x960 frame is roughly 100-200 kB, so 30 s of recording
+takes 100-200 MB: record short sessions to a disk with room for them.
+Encoding one main frame costs tens of ms on a Pi, more than a detection
+pass, so FrameRecorder copies each frame and encodes it on its own thread.
+If the encoder falls QUEUE_FRAMES behind, frames are dropped from the
+recording (and counted) rather than slowing the detection loop.
+"""
+
+import queue
+import struct
+import threading
+
+import cv2
+import numpy as np
+
+MAGIC = b"PEBOFRM1"
+RECORD = struct.Struct("<dII")
+JPEG_QUALITY = 90
+QUEUE_FRAMES = 8  # Frames waiting for the encoder before new ones are dropped
+
+
+class FrameRecorder:
+    """Appends (capture_time, frame, lores_gray) records to a file from a writer thread"""
+
+    def __init__(self, path, quality=JPEG_QUALITY, queue_frames=QUEUE_FRAMES):
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        self.frames = 0
+        self.dropped = 0
+        self.pending = queue.Queue(maxsize=queue_frames)
+        self.thread = threading.Thread(target=self._run, name="frame-recorder", daemon=True)
+        self.thread.start()
+
+    def write(self, capture_time, frame, lores_gray):
+        """Queue a copy of the frames (they may be views into camera buffers)"""
+        try:
+            self.pending.put_nowait((capture_time, frame.copy(), lores_gray.copy()))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            record = self.pending.get()
+            if record is None:
+                return
+            try:
+                self._write_record(*record)
+            except Exception as e:
+                print(f"Frame recording error: {e}")
+
+    def _write_record(self, capture_time, frame, lores_gray):
+        ok_main, main = cv2.imencode(".jpg", frame, self.params)
+        ok_lores, lores = cv2.imencode(".jpg", lores_gray, self.params)
+        if not (ok_main and ok_lores):
+            raise ValueError("JPEG encoding failed")
+        self.file.write(RECORD.pack(capture_time, len(main), len(lores)))
+        self.file.write(main.tobytes())
+        self.file.write(lores.tobytes())
+        self.frames += 1
+
+    def close(self):
+        """Finish encoding the queued frames and close the file"""
+        self.pending.put(None)
+        self.thread.join()
+        self.file.close()
+        print(f"Recorded {self.frames} frames ({self.dropped} dropped)")
+
+
+class FrameReader:
+    """Iterates over the records of a recording as (capture_time, main_jpeg, lores_jpeg)"""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        if self.file.read(len(MAGIC)) != MAGIC:
+            self.file.close()
+            raise ValueError(f"{path} is not a frame recording")
+
+    def __iter__(self):
+        while True:
+            header = self.file.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            capture_time, main_len, lores_len = RECORD.unpack(header)
+            main = self.file.read(main_len)
+            lores = self.file.read(lores_len)
+            if len(lores) < lores_len:
+                return  # Truncated last record (recording was killed)
+            yield capture_time, main, lores
+
+    @staticmethod
+    def decode(main, lores):
+        """(frame, lores_gray) arrays from one record's JPEG bytes"""
+        frame = cv2.imdecode(np.frombuffer(main, np.uint8), cv2.IMREAD_COLOR)
+        lores_gray = cv2.imdecode(np.frombuffer(lores, np.uint8), cv2.IMREAD_GRAYSCALE)
+        return frame, lores_gray
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Single-slot, overwrite-on-write mailbox between the detection thread and its consumers
+
+A bounded queue hands consumers whatever was queued first, and a full queue
+makes the producer drop the newest result. Here the producer always
+overwrites the one slot and every consumer wakes on the condition variable
+and gets the newest item. Consumers remember the sequence number they last
+saw, so each one sees every new item at most once and never polls:
+
+    seq = 0
+    while running:
+        seq, item = mailbox.get(seq, timeout=0.5)
+        if item is None:
+            continue  # timed out (or closed)
+"""
+
+import threading
+
+
+class LatestMailbox:
+    """Holds only the newest item; any number of consumers can wait for the next one"""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.item = None
+        self.seq = 0
+        self.closed = False
+
+    def put(self, item):
+        """Replace the held item and wake every waiting consumer"""
+        with self.cond:
+            self.item = item
+            self.seq += 1
+            self.cond.notify_all()
+
+    def get(self, last_seq=0, timeout=None):
+        """Wait for an item newer than last_seq; returns (seq, item), or
+        (last_seq, None) on timeout or after close()"""
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.seq > last_seq or self.closed, timeout):
+                return last_seq, None
+            if self.seq <= last_seq:
+                return last_seq, None
+            return self.seq, self.item
+
+    def latest(self):
+        """(seq, item) without waiting"""
+        with self.cond:
+            return self.seq, self.item
+
+    def close(self):
+        """Wake all consumers; get() stops blocking"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
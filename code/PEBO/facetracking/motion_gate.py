@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Motion gate that idles the face tracking pipeline when nobody is at the desk
+
+Face detection and QR scanning ran on every frame at full rate even on an
+empty desk. MotionGate compares each lores Y frame, shrunk to GATE_SIZE and
+blurred, with a running background (cv2.accumulateWeighted):
+
+  active   a face is present or there was motion in the last HOLD seconds:
+           every frame is detected, camera at ACTIVE_FPS
+  idle     frames are only compared with the background (well under 1 ms);
+           detection and QR scanning are skipped and the camera runs at
+           IDLE_FPS until a frame differs in more than MIN_CHANGED of its pixels
+
+The background adapts slowly (ALPHA), so lighting drift does not count as
+motion; a light switched on does, which just wakes the pipeline for HOLD s.
+"""
+
+import cv2
+import numpy as np
+
+GATE_SIZE = (80, 60)
+ALPHA = 0.05          # Background adaptation per frame
+DIFF_THRESHOLD = 20   # Gray levels a pixel must change by to count
+MIN_CHANGED = 0.01    # Fraction of changed pixels that counts as motion
+HOLD = 10.0           # Seconds to stay active after the last motion or face
+ACTIVE_FPS = 30
+IDLE_FPS = 4
+
+
+class MotionGate:
+    """Decides per frame whether the detectors should run"""
+
+    def __init__(self, hold=HOLD, diff_threshold=DIFF_THRESHOLD, min_changed=MIN_CHANGED):
+        self.hold = hold
+        self.diff_threshold = diff_threshold
+        self.min_changed = min_changed
+        self.background = None
+        self.last_activity = None
+        self.active = True
+        self.frames = 0
+        self.skipped = 0
+        self.wakeups = 0
+
+    def motion(self, lores_gray):
+        """True if the frame differs from the background; updates the background"""
+        small = cv2.GaussianBlur(cv2.resize(lores_gray, GATE_SIZE, interpolation=cv2.INTER_AREA), (5, 5), 0)
+        small = small.astype(np.float32)
+        if self.background is None:
+            self.background = small
+            return True
+        changed = np.count_nonzero(cv2.absdiff(small, self.background) > self.diff_threshold)
+        cv2.accumulateWeighted(small, self.background, ALPHA)
+        return changed > self.min_changed * small.size
+
+    def update(self, lores_gray, now, face_present=False):
+        """Feed one frame; returns True if this frame should go through detection"""
+        self.frames += 1
+        if self.motion(lores_gray) or face_present:
+            self.last_activity = now
+        was_active = self.active
+        self.active = self.last_activity is not None and now - self.last_activity < self.hold
+        if self.active and not was_active:
+            self.wakeups += 1
+        if not self.active:
+            self.skipped += 1
+        return self.active
+
+    def fps(self):
+        return ACTIVE_FPS if self.active else IDLE_FPS
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "wakeups": self.wakeups,
+            "active": self.active,
+        }
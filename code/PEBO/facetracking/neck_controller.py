@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+PD control of the neck and body servos from the face position error
+
+Replaces the partition lookup tables, which snapped the face center to a few
+fixed angles and ignored faces in the gaps between partitions. PDController
+turns a pixel error into degrees every control tick:
+
+    u = kp * e + kd * de/dt        (e in degrees, from a pixel-to-degree gain)
+
+with a deadband around zero error so a face that is close enough does not
+make the servo hunt (for the absolute neck targets, small target changes are
+skipped instead, see NECK_DEADBAND). It is used in two ways:
+
+  absolute     target = neutral + u   camera does not move with the servo (the
+                                      dual neck servos look at a face seen by
+                                      the body camera)
+  incremental  target = current + u   camera turns with the servo (center/body
+                                      servo), so the error itself goes to zero
+
+Gains: the neck values are a linear fit of the old partition tables (which
+were calibrated on the robot); the body values follow from the camera's
+field of view.
+"""
+
+import time
+
+# Neck servos (channels 7/6): fit of the old h/v partition angle tables
+NECK_H_DEG_PER_PX = 0.119
+NECK_V_DEG_PER_PX = 0.100
+NECK_H_NEUTRAL = 80
+NECK_V_NEUTRAL = 110
+NECK_DEADBAND = 1.5     # Degrees: smaller target changes are not sent to the planner
+NECK_KD = 0.05          # Seconds of lead on the face velocity
+
+# Camera turning with the servo: Pi Camera Module v2, 62.2 degrees across 640 px
+CAMERA_DEG_PER_PX = 62.2 / 640
+BODY_KP = 0.5           # Fraction of the error corrected per control tick
+BODY_KD = 0.05
+
+
+class PDController:
+    """Proportional-derivative controller on a pixel error, output in degrees"""
+
+    def __init__(self, deg_per_px, kp=1.0, kd=0.0, deadband=0, limit=None):
+        self.deg_per_px = deg_per_px
+        self.kp = kp
+        self.kd = kd
+        self.deadband = deadband
+        self.limit = limit  # Optional clamp on the output (degrees)
+        self.last_error = None
+        self.last_time = None
+
+    def update(self, error_px, rate_px=None, now=None):
+        """Output for this tick. rate_px is d(error)/dt in px/s if known (e.g.
+        from the face predictor); otherwise it is differenced from the last call."""
+        now = time.monotonic() if now is None else now
+        if abs(error_px) <= self.deadband:
+            # Forget the history too: differencing against the zeroed error would
+            # give a derivative kick on the first tick outside the deadband
+            self.reset()
+            return 0.0
+        error = error_px * self.deg_per_px
+        if rate_px is not None:
+            derivative = rate_px * self.deg_per_px
+        elif self.last_time is not None and now > self.last_time:
+            derivative = (error - self.last_error) / (now - self.last_time)
+        else:
+            derivative = 0.0
+        self.last_error = error
+        self.last_time = now
+        output = self.kp * error + self.kd * derivative
+        if self.limit is not None:
+            output = max(-self.limit, min(self.limit, output))
+        return output
+
+    def reset(self):
+        self.last_error = None
+        self.last_time = None
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Wi-Fi provisioning jobs, run off the face detection thread
+
+Joining a network from a QR code takes several nmcli calls, waiting for an
+address and a Firebase write: tens of seconds in which tracking must keep
+running. The detection loop only calls ProvisioningWorker.submit(); a worker
+thread walks the job through its stages and reports every state change:
+
+  queued -> connecting -> saving -> registering -> done
+                 \\            \\             \\-> failed
+
+Each stage is a callable taking the job and returning True to continue or
+False to fail the job (it may set job.error to say why). Only one job runs
+at a time; codes seen while a job is active are ignored.
+"""
+
+import queue
+import threading
+import time
+
+QUEUED = "queued"
+CONNECTING = "connecting"
+SAVING = "saving"
+REGISTERING = "registering"
+DONE = "done"
+FAILED = "failed"
+
+FINISHED = (DONE, FAILED)
+
+
+class ProvisioningJob:
+    """One QR provisioning request and where it has got to"""
+
+    def __init__(self, payload, config):
+        self.payload = payload  # Raw QR text
+        self.config = config    # Parsed ssid/password/deviceId/userId
+        self.state = QUEUED
+        self.error = None
+        self.result = {}        # Stages can leave details here (ip, ssid, ...)
+        self.history = [(QUEUED, time.time())]
+
+    @property
+    def finished(self):
+        return self.state in FINISHED
+
+    def elapsed(self):
+        return self.history[-1][1] - self.history[0][1]
+
+
+class ProvisioningWorker:
+    """Runs provisioning jobs through their stages on a background thread"""
+
+    def __init__(self, stages, on_state=None):
+        self.stages = stages  # [(state, step(job) -> bool), ...] in order
+        self.on_state = on_state
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.current = None
+        self.last = None
+        self.thread = threading.Thread(target=self._run, name="provisioning", daemon=True)
+        self.thread.start()
+
+    def submit(self, payload, config):
+        """Queue a job and return it, or None if one is already in progress"""
+        with self.lock:
+            if self.current is not None:
+                return None
+            job = ProvisioningJob(payload, config)
+            self.current = job
+        self._notify(job)
+        self.jobs.put(job)
+        return job
+
+    def busy(self):
+        with self.lock:
+            return self.current is not None
+
+    def status(self):
+        """The active job, or the last finished one (None before the first job)"""
+        with self.lock:
+            return self.current or self.last
+
+    def _set_state(self, job, state):
+        job.state = state
+        job.history.append((state, time.time()))
+        self._notify(job)
+
+    def _notify(self, job):
+        if self.on_state:
+            try:
+                self.on_state(job)
+            except Exception as e:
+                print(f"Provisioning feedback error: {e}")
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            for state, step in self.stages:
+                self._set_state(job, state)
+                try:
+                    ok = step(job)
+                except Exception as e:
+                    job.error = job.error or str(e)
+                    ok = False
+                if not ok:
+                    job.error = job.error or f"{state} failed"
+                    break
+            else:
+                ok = True
+            with self.lock:
+                self.current = None
+                self.last = job
+            self._set_state(job, DONE if ok else FAILED)
+            print(f"Wi-Fi provisioning {job.state} after {job.elapsed():.1f}s"
+                  + (f": {job.error}" if job.error else ""))
+
+    def stop(self):
+        self.jobs.put(None)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Adaptive QR scan scheduling for the face tracking loop
+
+QR provisioning happens rarely, so running pyzbar over the full frame after
+every face detection pass wastes most of the detection loop. QRScanScheduler
+decides when a frame is worth scanning and makes each scan cheap:
+
+  - cadence: idle_interval with nobody in view, tracking_interval while a face
+    is being tracked, and every hot_interval for a few seconds after a
+    candidate was seen (someone is holding a code up to the camera)
+  - pre-check: a half-resolution binary image (the camera's lores Y plane when
+    available) is searched for QR finder patterns (three nested
+    dark/light/dark squares); pyzbar only runs on the region around the
+    candidates (optionally downscaled), never on a frame without any
+  - dedup: a payload that was already reported is ignored until its TTL expires,
+    which also paces retries of a code that failed to provision
+"""
+
+import statistics
+import time
+
+import cv2
+import pyzbar.pyzbar as pyzbar
+
+IDLE_INTERVAL = 0.5      # Seconds between scans with no face in view
+TRACKING_INTERVAL = 2.0  # Back off while a face is being tracked
+HOT_INTERVAL = 0.1       # Scan rate while finder patterns are in view
+HOT_HOLD = 3.0           # How long a candidate keeps the scheduler hot
+PAYLOAD_TTL = 20.0       # Seconds before the same payload is reported again
+
+PRECHECK_SCALE = 2       # Finder-pattern search runs at 1/2 resolution
+MIN_FINDERS = 2          # Candidates needed before decoding a region
+MIN_FINDER_SIZE = 4      # Smallest finder pattern (pixels, at pre-check scale)
+
+
+def to_gray(image):
+    return image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+
+
+def find_finder_patterns(small, scale=PRECHECK_SCALE):
+    """Return (x, y, w, h) boxes of likely QR finder patterns in a downscaled
+    grayscale image, in full-frame coordinates (scale = full width / small width)"""
+    binary = cv2.adaptiveThreshold(small, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
+                                   cv2.THRESH_BINARY_INV, 21, 7)
+    contours, hierarchy = cv2.findContours(binary, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    if hierarchy is None:
+        return []
+    hierarchy = hierarchy[0]
+    boxes = []
+    for i, contour in enumerate(contours):
+        # Dark ring -> light ring (hole) -> dark core: two levels of children
+        child = hierarchy[i][2]
+        if child < 0 or hierarchy[child][2] < 0:
+            continue
+        x, y, w, h = cv2.boundingRect(contour)
+        if w < MIN_FINDER_SIZE or h < MIN_FINDER_SIZE or not 0.5 <= w / h <= 2.0:
+            continue
+        boxes.append((x * scale, y * scale, w * scale, h * scale))
+    return boxes
+
+
+def _contains(outer, inner):
+    ox, oy, ow, oh = outer
+    ix, iy, iw, ih = inner
+    return outer != inner and ox <= ix and oy <= iy and ix + iw <= ox + ow and iy + ih <= oy + oh
+
+
+def candidate_region(boxes, frame_shape):
+    """Bounding box of the finder patterns plus a quiet-zone margin, clipped to the frame
+
+    Boxes that contain other boxes (the outline of the whole code, or anything
+    framing it) are dropped, and the margin is the median finder size, so one
+    large contour cannot blow the region up to most of the frame.
+    """
+    finders = [box for box in boxes if not any(_contains(box, other) for other in boxes)] or boxes
+    x1 = min(x for x, _, _, _ in finders)
+    y1 = min(y for _, y, _, _ in finders)
+    x2 = max(x + w for x, _, w, _ in finders)
+    y2 = max(y + h for _, y, _, h in finders)
+    margin = int(statistics.median(max(w, h) for _, _, w, h in finders))
+    height, width = frame_shape[:2]
+    return (max(0, x1 - margin), max(0, y1 - margin),
+            min(width, x2 + margin), min(height, y2 + margin))
+
+
+def _offset(decoded, dx, dy):
+    """Move a pyzbar result from crop coordinates back into the full frame"""
+    polygon = [type(point)(point.x + dx, point.y + dy) for point in decoded.polygon]
+    rect = decoded.rect._replace(left=decoded.rect.left + dx, top=decoded.rect.top + dy)
+    return decoded._replace(polygon=polygon, rect=rect)
+
+
+class QRScanScheduler:
+    """Decides when to scan for QR codes and scans only candidate regions"""
+
+    def __init__(self, idle_interval=IDLE_INTERVAL, tracking_interval=TRACKING_INTERVAL,
+                 hot_interval=HOT_INTERVAL, hot_hold=HOT_HOLD, payload_ttl=PAYLOAD_TTL,
+                 decoder=pyzbar.decode):
+        self.idle_interval = idle_interval
+        self.tracking_interval = tracking_interval
+        self.hot_interval = hot_interval
+        self.hot_hold = hot_hold
+        self.payload_ttl = payload_ttl
+        self.decoder = decoder
+        self.last_scan = 0.0
+        self.hot_until = 0.0
+        self.seen = {}  # payload -> time it may be reported again
+        # Counters for checking how much of the detection loop scanning costs
+        self.frames = 0
+        self.scans = 0
+        self.decodes = 0
+        self.scan_time = 0.0
+
+    def interval(self, now, face_tracked):
+        if now < self.hot_until:
+            return self.hot_interval
+        return self.tracking_interval if face_tracked else self.idle_interval
+
+    def due(self, now, face_tracked=False):
+        """True if this frame should be scanned"""
+        self.frames += 1
+        return now - self.last_scan >= self.interval(now, face_tracked)
+
+    def scan(self, frame, now=None, lores=None, scale=1.0):
+        """Scan a full-resolution frame (grayscale or RGB); returns
+        (all decoded objects, new payload strings)
+
+        lores is an optional low-resolution grayscale image of the same view
+        (e.g. the Y plane of the camera's lores stream) used for the
+        pre-check instead of downscaling the frame.
+
+        scale < 1 shrinks the candidate region by that factor before decoding,
+        e.g. to decode a high-resolution camera frame at display resolution;
+        decoded coordinates are then frame coordinates times scale.
+        """
+        now = time.time() if now is None else now
+        started = time.perf_counter()
+        self.last_scan = now
+        self.scans += 1
+        decoded = []
+        height, width = frame.shape[:2]
+        if lores is None:
+            lores = cv2.resize(to_gray(frame), (width // PRECHECK_SCALE, height // PRECHECK_SCALE),
+                               interpolation=cv2.INTER_AREA)
+        boxes = find_finder_patterns(lores, width // lores.shape[1])
+        if len(boxes) >= MIN_FINDERS:
+            self.hot_until = now + self.hot_hold
+            x1, y1, x2, y2 = candidate_region(boxes, frame.shape)
+            self.decodes += 1
+            crop = to_gray(frame[y1:y2, x1:x2])
+            if scale != 1.0:
+                size = (max(1, round((x2 - x1) * scale)), max(1, round((y2 - y1) * scale)))
+                crop = cv2.resize(crop, size, interpolation=cv2.INTER_AREA)
+            decoded = [_offset(obj, round(x1 * scale), round(y1 * scale)) for obj in self.decoder(crop)]
+        self.scan_time += time.perf_counter() - started
+        return decoded, self._new_payloads(decoded, now)
+
+    def _new_payloads(self, decoded, now):
+        for payload, expires in list(self.seen.items()):
+            if expires <= now:
+                del self.seen[payload]
+        fresh = []
+        for obj in decoded:
+            payload = obj.data.decode('utf-8', errors='replace')
+            if payload not in self.seen:
+                self.seen[payload] = now + self.payload_ttl
+                fresh.append(payload)
+        return fresh
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "scans": self.scans,
+            "decodes": self.decodes,
+            "scan_ms_avg": (self.scan_time / self.scans * 1000) if self.scans else 0.0,
+        }
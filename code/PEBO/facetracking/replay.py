@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Record camera frames on the robot and replay them through the face tracking pipeline
+
+Recording runs the normal tracker (face_tracking_qr.CombinedFaceTracking) and
+writes its frames to a file (facetracking/frame_log.py; frames the encoder
+cannot keep up with are left out):
+  python3 -m facetracking.replay record /home/pi/session.frames --seconds 30
+
+Replay feeds the file through the same detection, QR, capture and servo-control
+code, with fake PWM/servo backends and no camera, Wi-Fi or Firebase access, so
+it runs on any Linux box. It still imports the tracker's modules, so that box
+needs mediapipe, opencv-python, numpy, pyzbar (and the libzbar0 system
+library), adafruit-circuitpython-pca9685, adafruit-circuitpython-motor,
+firebase-admin and cryptography:
+  python3 -m facetracking.replay play session.frames          # recorded pace
+  python3 -m facetracking.replay play session.frames --fast   # as fast as possible
+
+At the recorded pace frames that fall more than MAX_LAG behind are dropped,
+as the camera would; --fast processes every frame and gives the detection
+throughput. The tracker's cleanup prints the per-stage latency table
+(facetracking/stage_timing.py; capture = file read and JPEG decode here), then
+the replay report adds end-to-end fps, dropped frames and servo commands.
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from facetracking.face_tracking_qr import CombinedFaceTracking
+from facetracking.frame_log import FrameReader
+
+MAX_LAG = 0.1  # Seconds behind the recorded pace after which a frame is dropped
+
+
+class FakeServo:
+    """Stands in for adafruit_motor.servo.Servo and logs every commanded angle"""
+
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+        self._angle = None
+
+    @property
+    def angle(self):
+        return self._angle
+
+    @angle.setter
+    def angle(self, value):
+        self._angle = value
+        self.log.append((time.monotonic(), self.name, value))
+
+
+class FakeChannel:
+    def __init__(self):
+        self.duty_cycle = 0
+
+
+class FakePWM:
+    """Stands in for the PCA9685 (and its I2C client)"""
+
+    def __init__(self, channels=16):
+        self.channels = [FakeChannel() for _ in range(channels)]
+        self.frequency = 50
+
+    def deinit(self):
+        pass
+
+
+class FakeCamera:
+    def set_controls(self, controls):
+        pass
+
+    def stop(self):
+        pass
+
+
+class ReplayFaceTracking(CombinedFaceTracking):
+    """CombinedFaceTracking fed from a recording instead of the camera"""
+
+    def __init__(self, path, realtime=True, capture_dir=None):
+        self.replay_path = path
+        self.realtime = realtime
+        self.capture_dir = capture_dir or tempfile.mkdtemp(prefix="pebo-replay-")
+        self.servo_log = []
+        self.frames = 0
+        self.dropped = 0
+        self.captures = 0
+        self.qr_payloads = []
+        self.replay_time = 0.0
+        super().__init__(headless=True)
+
+    def setup_servos(self):
+        self.i2c = self.pwm = FakePWM()
+        self.h_servo = FakeServo("h", self.servo_log)
+        self.v_servo = FakeServo("v", self.servo_log)
+        self.center_servo = FakeServo("center", self.servo_log)
+
+    def setup_camera(self):
+        self.picam2 = FakeCamera()
+
+    def initialize_firebase(self):
+        pass
+
+    def encrypt_image(self, image, output_path=None):
+        super().encrypt_image(image, os.path.join(self.capture_dir, "captured.jpg.enc"))
+        self.captures += 1
+
+    def process_qr_code(self, qr_data):
+        # Never touch the Wi-Fi of the machine running the replay
+        self.qr_payloads.append(qr_data)
+
+    def face_detection_thread(self):
+        reader = FrameReader(self.replay_path)
+        start = time.monotonic()
+        first = None
+        try:
+            records = iter(reader)
+            while self.running:
+                read_start = time.perf_counter()
+                record = next(records, None)
+                if record is None:
+                    break
+                timestamp, main, lores = record
+                if self.realtime:
+                    first = timestamp if first is None else first
+                    capture_time = start + (timestamp - first)
+                    now = time.monotonic()
+                    if now - capture_time > MAX_LAG:
+                        self.dropped += 1
+                        continue
+                    time.sleep(max(0.0, capture_time - now))
+                    read_start = time.perf_counter()
+                else:
+                    capture_time = time.monotonic()
+                frame, lores_gray = reader.decode(main, lores)
+                self.latency.add("capture", time.perf_counter() - read_start)
+                self.process_frame(frame, lores_gray, capture_time)
+                self.frames += 1
+        except Exception as e:
+            print(f"Replay error: {e}")
+        finally:
+            reader.close()
+            self.replay_time = time.monotonic() - start
+            self.running = False  # Ends run()
+
+    def report(self):
+        fps = self.frames / self.replay_time if self.replay_time else 0.0
+        print(f"Frames: {self.frames} processed, {self.dropped} dropped in {self.replay_time:.1f} s "
+              f"({fps:.1f} fps end to end)")
+        commands = {}
+        for _, name, _ in self.servo_log:
+            commands[name] = commands.get(name, 0) + 1
+        print(f"Servo commands: {commands}")
+        print(f"Captures: {self.captures} (in {self.capture_dir})")
+        print(f"QR payloads: {self.qr_payloads}")
+
+
+def record(path, seconds=None):
+    tracker = CombinedFaceTracking(record_path=path)
+    if seconds:
+        timer = threading.Timer(seconds, lambda: setattr(tracker, "running", False))
+        timer.daemon = True
+        timer.start()
+    tracker.run()
+
+
+def play(path, realtime=True):
+    tracker = ReplayFaceTracking(path, realtime=realtime)
+    tracker.run()
+    tracker.report()
+    return tracker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay camera frames for the face tracking pipeline")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="run the tracker and record its frames")
+    record_parser.add_argument("path")
+    record_parser.add_argument("--seconds", type=float, help="stop after this long (default: until Ctrl+C)")
+    play_parser = commands.add_parser("play", help="replay a recording with fake servos")
+    play_parser.add_argument("path")
+    play_parser.add_argument("--fast", action="store_true", help="process every frame as fast as possible")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.path, args.seconds)
+    else:
+        play(args.path, realtime=not args.fast)
+
+
+if __name__ == "__main__":
+    main()
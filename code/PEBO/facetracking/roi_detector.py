@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Two-scale face detection: coarse full frame, high resolution around the face
+
+MediaPipe's short-range model scales its input to 128x128, so on a whole
+640x480 frame a face a couple of metres away is a few pixels wide and is
+missed or falls under the minimum area. TwoScaleDetector spends the same
+single detector call per detection differently:
+
+  coarse   the whole frame, shrunk to COARSE_SIZE: used to acquire faces, when
+           there is no previous face and every COARSE_EVERY detections
+  roi      a square around the last known face, cut from the high-resolution
+           camera frame (ROI_SCALE face sizes wide), scaled to ROI_SIZE; the
+           face fills a large part of the model input
+If the region comes back empty the coarse pass runs on the same frame. A face
+the coarse pass finds too small to accept can be confirmed with detect_region().
+
+Detections are returned with their relative coordinates mapped back to the
+whole frame, so callers see the same thing as from a full-frame call.
+"""
+
+import cv2
+
+COARSE_SIZE = (320, 240)
+COARSE_EVERY = 5
+ROI_SCALE = 3.0       # Region side in face sizes
+ROI_SIZE = 192        # Region is resized to this (square) before detection
+ROI_MIN_SIDE = 0.25   # Smallest region side as a fraction of the frame height
+
+COARSE = "coarse"
+ROI = "roi"
+
+
+def face_region(face_box, frame_width, frame_height, scale=ROI_SCALE):
+    """Square (x1, y1, x2, y2) around a relative (xmin, ymin, width, height) box, clamped to the frame"""
+    xmin, ymin, width, height = face_box
+    side = max(width * frame_width, height * frame_height) * scale
+    side = int(min(max(side, ROI_MIN_SIDE * frame_height), frame_width, frame_height))
+    cx = (xmin + width / 2) * frame_width
+    cy = (ymin + height / 2) * frame_height
+    x1 = int(min(max(cx - side / 2, 0), frame_width - side))
+    y1 = int(min(max(cy - side / 2, 0), frame_height - side))
+    return x1, y1, x1 + side, y1 + side
+
+
+def remap_detection(detection, region, frame_width, frame_height):
+    """Convert a detection made on a region crop to whole-frame relative coordinates (in place)"""
+    x1, y1, x2, y2 = region
+    sx, sy = (x2 - x1) / frame_width, (y2 - y1) / frame_height
+    ox, oy = x1 / frame_width, y1 / frame_height
+    location = detection.location_data
+    bbox = location.relative_bounding_box
+    bbox.xmin = ox + bbox.xmin * sx
+    bbox.ymin = oy + bbox.ymin * sy
+    bbox.width = bbox.width * sx
+    bbox.height = bbox.height * sy
+    for keypoint in location.relative_keypoints:
+        keypoint.x = ox + keypoint.x * sx
+        keypoint.y = oy + keypoint.y * sy
+    return detection
+
+
+class TwoScaleDetector:
+    """Wraps a FaceDetection-like detector (process(rgb).detections)"""
+
+    def __init__(self, detector, coarse_size=COARSE_SIZE, coarse_every=COARSE_EVERY, roi_size=ROI_SIZE):
+        self.detector = detector
+        self.coarse_size = coarse_size
+        self.coarse_every = coarse_every
+        self.roi_size = roi_size
+        self.since_coarse = 0
+        self.coarse_runs = 0
+        self.roi_runs = 0
+        self.roi_misses = 0
+
+    def detect(self, frame, face_box=None):
+        """Detections in an RGB frame of any size, and the pass that found them (COARSE or ROI).
+        face_box is the last known face as a relative (xmin, ymin, width, height), or None."""
+        if face_box is not None and self.since_coarse < self.coarse_every:
+            self.since_coarse += 1
+            detections = self.detect_region(frame, face_box)
+            if detections:
+                return detections, ROI
+        self.since_coarse = 0
+        self.coarse_runs += 1
+        small = cv2.resize(frame, self.coarse_size, interpolation=cv2.INTER_AREA)
+        return self.detector.process(small).detections, COARSE
+
+    def detect_region(self, frame, face_box):
+        """High-resolution pass around face_box only; whole-frame detections or None"""
+        self.roi_runs += 1
+        height, width = frame.shape[:2]
+        region = face_region(face_box, width, height)
+        x1, y1, x2, y2 = region
+        # Always resized: the detector needs a contiguous image
+        interpolation = cv2.INTER_AREA if y2 - y1 > self.roi_size else cv2.INTER_LINEAR
+        crop = cv2.resize(frame[y1:y2, x1:x2], (self.roi_size, self.roi_size), interpolation=interpolation)
+        detections = self.detector.process(crop).detections
+        if not detections:
+            self.roi_misses += 1
+            return None
+        return [remap_detection(d, region, width, height) for d in detections]
+
+    def stats(self):
+        return {
+            "coarse": self.coarse_runs,
+            "roi": self.roi_runs,
+            "roi_misses": self.roi_misses,
+        }
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Encrypted face capture without plaintext on disk
+
+The face crop is JPEG-encoded in memory, AES-GCM encrypted and written next
+to its final path, then renamed over it. The SD card only ever sees the
+ciphertext, one file write per capture, and readers
+(recognition/person_recognition.py) never see a half-written file.
+
+File format (unchanged): 12-byte nonce followed by the AES-GCM ciphertext.
+"""
+
+import os
+
+import cv2
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+CAPTURE_PATH = '/home/pi/Documents/GitHub/e20-3yp-P-E-BO-Desk-Companion/code/PEBO/captured.jpg.enc'
+JPEG_QUALITY = 95
+NONCE_SIZE = 12
+
+
+def encrypt_bytes(data, key):
+    nonce = os.urandom(NONCE_SIZE)
+    return nonce + AESGCM(key).encrypt(nonce, data, None)
+
+
+def write_atomic(path, data):
+    """Write to a temporary file in the same directory, sync it, then rename it over path"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+        # On disk before the rename, so a power cut cannot leave an empty file at path
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def save_encrypted_jpeg(image, key, output_path=CAPTURE_PATH, quality=JPEG_QUALITY):
+    """Encode a BGR image as JPEG, encrypt it and store it atomically; returns the bytes written"""
+    ok, jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    data = encrypt_bytes(jpeg.tobytes(), key)
+    write_atomic(output_path, data)
+    return len(data)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Fixed-rate, non-blocking motion planner for the neck servos
+
+The tracking threads used to move a servo by stepping one degree at a time
+with a sleep in between, which blocked them for the whole move. ServoPlanner
+instead holds a target per servo and, on its own thread, advances every
+servo a little each tick (RATE Hz, the servo PWM frame rate) under a
+velocity and acceleration limit:
+
+    planner = ServoPlanner()
+    planner.add("h", servo.Servo(pwm.channels[7]), 80, max_speed=120, max_accel=600)
+    planner.start()
+    planner.set_target("h", 105)   # returns at once; may be called again mid-move
+
+Motion is trapezoidal: accelerate towards the target, cruise at max_speed,
+and brake in time to stop on it. A new target mid-move is picked up on the
+next tick, carrying the current velocity over.
+"""
+
+import threading
+import time
+
+RATE = 50                # Ticks per second
+MIN_WRITE_DELTA = 0.25   # Degrees of change before a new angle is sent to the servo
+SNAP = 0.2               # Degrees from the target at which a slow servo is considered there
+
+
+class ServoAxis:
+    """Position/velocity state of one servo"""
+
+    def __init__(self, servo_obj, angle, max_speed, max_accel, limits=(0, 180)):
+        self.servo = servo_obj
+        self.limits = limits
+        self.max_speed = max_speed  # Degrees per second
+        self.max_accel = max_accel  # Degrees per second squared
+        self.position = float(angle)
+        self.velocity = 0.0
+        self.target = float(angle)
+        self.written = None
+
+    def step(self, dt):
+        error = self.target - self.position
+        if abs(error) < SNAP and abs(self.velocity) <= self.max_accel * dt:
+            self.position = self.target
+            self.velocity = 0.0
+            return
+        direction = 1.0 if error > 0 else -1.0
+        braking_distance = self.velocity * self.velocity / (2 * self.max_accel)
+        if self.velocity * direction <= 0 or braking_distance < abs(error):
+            self.velocity += direction * self.max_accel * dt
+        else:
+            self.velocity -= direction * self.max_accel * dt
+        self.velocity = max(-self.max_speed, min(self.max_speed, self.velocity))
+        position = self.position + self.velocity * dt
+        if (self.target - position) * direction < 0:
+            # Would overshoot: land on the target
+            position = self.target
+            self.velocity = 0.0
+        self.position = position
+
+    def write(self, force=False):
+        if force or self.written is None or abs(self.position - self.written) >= MIN_WRITE_DELTA:
+            self.servo.angle = self.position
+            self.written = self.position
+
+
+class ServoPlanner:
+    """Moves a set of named servos towards their targets on a background thread"""
+
+    def __init__(self, rate=RATE):
+        self.period = 1.0 / rate
+        self.axes = {}
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    def add(self, name, servo_obj, angle, max_speed, max_accel, limits=(0, 180)):
+        """Register a servo and put it at angle straight away"""
+        axis = ServoAxis(servo_obj, angle, max_speed, max_accel, limits)
+        with self.lock:
+            self.axes[name] = axis
+        axis.write(force=True)
+
+    def set_target(self, name, angle):
+        """Aim a servo at angle (clamped to its limits); returns immediately"""
+        with self.lock:
+            axis = self.axes[name]
+            low, high = axis.limits
+            axis.target = float(max(low, min(high, angle)))
+
+    def target(self, name):
+        with self.lock:
+            return self.axes[name].target
+
+    def position(self, name):
+        with self.lock:
+            return self.axes[name].position
+
+    def at_target(self, *names):
+        with self.lock:
+            return all(self.axes[name].position == self.axes[name].target
+                       and self.axes[name].velocity == 0.0 for name in (names or self.axes))
+
+    def wait(self, *names, timeout=3.0):
+        """Block until the named servos (default: all) have arrived; False on timeout"""
+        deadline = time.monotonic() + timeout
+        while not self.at_target(*names):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.period)
+        return True
+
+    def tick(self, dt):
+        with self.lock:
+            axes = list(self.axes.values())
+            for axis in axes:
+                axis.step(dt)
+        for axis in axes:
+            try:
+                axis.write()
+            except Exception as e:
+                print(f"Servo write error: {e}")
+
+    def _run(self):
+        last = time.monotonic()
+        next_tick = last
+        while self.running:
+            now = time.monotonic()
+            # Cap dt so a stall does not turn into one big jump
+            self.tick(min(now - last, 2 * self.period))
+            last = now
+            next_tick += self.period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="servo-planner", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Per-stage latency of the face tracking pipeline
+
+CombinedFaceTracking records how long each stage took on every frame:
+  capture   waiting for / reading the next camera frame
+  detect    face detection or optical-flow tracking
+  qr        QR pre-check and decode (only on frames the scheduler picks)
+  servo     frame capture to neck servo command (age of the face position used)
+  center    the same for the center (body) servo
+The last SAMPLES values per stage are kept for percentiles; counts cover the
+whole run. Printed on cleanup and by the replay harness (facetracking/replay.py).
+"""
+
+import threading
+import time
+from collections import deque
+
+SAMPLES = 1000
+
+
+class StageTimer:
+    """Thread-safe latency samples per pipeline stage"""
+
+    def __init__(self, samples=SAMPLES):
+        self.samples = samples
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counts = {}
+        self.first = {}
+        self.last = {}
+
+    def add(self, stage, seconds, now=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            if stage not in self.stages:
+                self.stages[stage] = deque(maxlen=self.samples)
+                self.counts[stage] = 0
+                self.first[stage] = now
+            self.stages[stage].append(seconds)
+            self.counts[stage] += 1
+            self.last[stage] = now
+
+    def count(self, stage):
+        with self.lock:
+            return self.counts.get(stage, 0)
+
+    def fps(self, stage="detect"):
+        """Rate of a stage between its first and last sample (detect = processed frames)"""
+        with self.lock:
+            if self.counts.get(stage, 0) < 2:
+                return 0.0
+            elapsed = self.last[stage] - self.first[stage]
+            return (self.counts[stage] - 1) / elapsed if elapsed > 0 else 0.0
+
+    def stats(self):
+        """{stage: {count, mean_ms, p50_ms, p95_ms, max_ms}}"""
+        with self.lock:
+            result = {}
+            for stage, values in self.stages.items():
+                ordered = sorted(values)
+                result[stage] = {
+                    "count": self.counts[stage],
+                    "mean_ms": sum(ordered) / len(ordered) * 1000,
+                    "p50_ms": ordered[len(ordered) // 2] * 1000,
+                    "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                    "max_ms": ordered[-1] * 1000,
+                }
+            return result
+
+    def report(self):
+        """Table of stats() as a printable string"""
+        lines = [f"{'stage':8s} {'count':>7s} {'mean ms':>8s} {'p50 ms':>8s} {'p95 ms':>8s} {'max ms':>8s}"]
+        for stage, s in self.stats().items():
+            lines.append(f"{stage:8s} {s['count']:7d} {s['mean_ms']:8.2f} {s['p50_ms']:8.2f} "
+                         f"{s['p95_ms']:8.2f} {s['max_ms']:8.2f}")
+        return "\n".join(lines)
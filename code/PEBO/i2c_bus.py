@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Shared I2C bus owner for PEBO
+
+The PCA9685 servo controller (0x40) and both eye OLEDs (0x3C/0x3D) sit on one
+physical bus. Instead of every module opening its own busio.I2C, they all ask
+for a client of the single SharedI2C:
+
+    from i2c_bus import get_bus, PRIORITY_SERVO
+    pwm = PCA9685(get_bus().client("neck", PRIORITY_SERVO))
+
+A client looks like busio.I2C to the adafruit drivers. Its transactions are
+queued by priority (servo updates before display frames) and executed by one
+worker thread that owns the real bus. Ready transactions are drained in
+batches under a single bus lock; between transactions the worker checks the
+queue, and a higher-priority arrival preempts the rest of the batch (it goes
+back in the queue in order), so a servo write waits at most for the one
+transaction on the wire.
+
+Clients also accept i2c_rdwr() block transfers (smbus2 messages), which the
+worker sends through /dev/i2c-1 for drivers like display/ssd1306_i2cdev.py.
+
+Writes are synchronous by default, so drivers that sleep between writes (the
+PCA9685 frequency setter waits 5 ms for its oscillator) keep their timing.
+Clients created with posted=True (the eye displays) return before the write
+is done; they call flush() before anything that depends on the write having
+happened. Within one client, transactions stay in FIFO order. Using a client
+after deinit() or the bus after close_bus() raises RuntimeError, and waits
+are bounded by CALL_TIMEOUT. The bus keeps per-client counts, bytes and
+latency plus overall utilization (see stats()/report()).
+"""
+
+import itertools
+import queue
+import threading
+import time
+
+PRIORITY_SERVO = 0
+PRIORITY_DEFAULT = 5
+PRIORITY_DISPLAY = 10
+
+BATCH_SIZE = 16          # Max transactions executed per bus lock
+MAX_PENDING_WRITES = 64  # Posted writes a client may have in flight before blocking
+CALL_TIMEOUT = 2.0       # Seconds to wait for a transaction (or a free posted-write slot)
+
+WRITE = "write"
+READ = "read"
+WRITE_READ = "write_read"
+RDWR = "rdwr"
+SCAN = "scan"
+FLUSH = "flush"
+
+I2C_BUS_NUMBER = 1  # /dev/i2c-1, used for i2c_rdwr block transfers
+
+
+def format_address(addr):
+    return "?" if addr is None else f"0x{addr:02X}"
+
+
+class Transaction:
+    def __init__(self, client, kind, addr, out=b"", in_len=0, nbytes=None):
+        self.client = client
+        self.kind = kind
+        self.addr = addr
+        self.out = out
+        self.in_len = in_len
+        self.nbytes = len(out) + in_len if nbytes is None else nbytes
+        self.result = None
+        self.error = None
+        self.queued = time.monotonic()
+        self.done = threading.Event()
+
+
+class BusClient:
+    """busio.I2C-compatible handle for one driver, with its own priority"""
+
+    def __init__(self, bus, name, priority, posted=False):
+        self.bus = bus
+        self.name = name
+        self.priority = priority
+        self.posted = posted
+        self.lock = threading.RLock()
+        self.pending_writes = threading.BoundedSemaphore(MAX_PENDING_WRITES)
+        self.closed = False
+
+    def _check_open(self):
+        if self.closed:
+            raise RuntimeError(f"I2C client '{self.name}' is closed")
+
+    def _post(self, txn):
+        """Queue a write without waiting for it (posted clients only)"""
+        if not self.pending_writes.acquire(timeout=CALL_TIMEOUT):
+            raise TimeoutError(f"I2C client '{self.name}': posted writes are not draining")
+        try:
+            self.bus.submit(txn)
+        except Exception:
+            self.pending_writes.release()
+            raise
+
+    # Locking only serializes this client's own callers; the worker owns the bus
+    def try_lock(self):
+        return self.lock.acquire(blocking=False)
+
+    def unlock(self):
+        self.lock.release()
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        self._check_open()
+        data = bytes(buffer[start:end])
+        txn = Transaction(self, WRITE, address, data)
+        if self.posted and data:
+            self._post(txn)
+        else:
+            # Empty writes are device probes; the caller needs the error
+            self.bus.call(txn)
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        self._check_open()
+        end = len(buffer) if end is None else end
+        data = self.bus.call(Transaction(self, READ, address, in_len=end - start))
+        buffer[start:end] = data
+
+    def writeto_then_readfrom(self, address, buffer_out, buffer_in, *,
+                              out_start=0, out_end=None, in_start=0, in_end=None):
+        self._check_open()
+        in_end = len(buffer_in) if in_end is None else in_end
+        data = self.bus.call(Transaction(self, WRITE_READ, address,
+                                         bytes(buffer_out[out_start:out_end]), in_end - in_start))
+        buffer_in[in_start:in_end] = data
+
+    def i2c_rdwr(self, *msgs):
+        """Combined i2c-dev transfer (smbus2 i2c_msg messages, written only)"""
+        self._check_open()
+        if not msgs:
+            raise ValueError("i2c_rdwr needs at least one message")
+        txn = Transaction(self, RDWR, msgs[0].addr, msgs, nbytes=sum(len(msg) for msg in msgs))
+        if self.posted:
+            self._post(txn)
+        else:
+            self.bus.call(txn)
+
+    def scan(self):
+        self._check_open()
+        return self.bus.call(Transaction(self, SCAN, None))
+
+    def flush(self):
+        """Wait until this client's posted writes have been executed"""
+        self._check_open()
+        self.bus.call(Transaction(self, FLUSH, None))
+
+    def deinit(self):
+        """Release this handle; the shared bus stays up for the other drivers"""
+        if self.posted and not self.closed:
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing I2C client '{self.name}': {e}")
+        self.closed = True
+
+
+class SharedI2C:
+    """Owns the physical bus and executes queued transactions by priority"""
+
+    def __init__(self, i2c=None):
+        if i2c is None:
+            import board
+            import busio
+            i2c = busio.I2C(board.SCL, board.SDA)
+        self.i2c = i2c
+        self.smbus = None  # Opened on the first block transfer
+        self.queue = queue.PriorityQueue()
+        self.sequence = itertools.count()
+        self.stats_lock = threading.Lock()
+        self.started = time.monotonic()
+        self.busy_time = 0.0
+        self.batches = 0
+        self.clients = {}
+        self.client_stats = {}
+        self.running = True
+        self.closing = False
+        self.worker = threading.Thread(target=self._run, name="i2c-bus", daemon=True)
+        self.worker.start()
+
+    def client(self, name, priority=PRIORITY_DEFAULT, posted=False):
+        """Return the shared handle for a named driver (created on first use); posted
+        clients do not wait for their writes (see flush())"""
+        with self.stats_lock:
+            if name not in self.clients:
+                self.clients[name] = BusClient(self, name, priority, posted)
+                self.client_stats[name] = {"transactions": 0, "bytes": 0, "errors": 0,
+                                           "latency_total": 0.0, "latency_max": 0.0}
+            return self.clients[name]
+
+    def submit(self, txn):
+        if self.closing:
+            raise RuntimeError("I2C bus is closed")
+        self.queue.put((txn.client.priority, next(self.sequence), txn))
+
+    def call(self, txn, timeout=CALL_TIMEOUT):
+        """Queue a transaction and wait for its result"""
+        self.submit(txn)
+        if not txn.done.wait(timeout):
+            raise TimeoutError(f"I2C {txn.kind} to {format_address(txn.addr)} ({txn.client.name}) timed out")
+        if txn.error:
+            raise txn.error
+        return txn.result
+
+    def _execute(self, txn):
+        if txn.kind == WRITE:
+            self.i2c.writeto(txn.addr, txn.out)
+        elif txn.kind == READ:
+            data = bytearray(txn.in_len)
+            self.i2c.readfrom_into(txn.addr, data)
+            txn.result = data
+        elif txn.kind == WRITE_READ:
+            data = bytearray(txn.in_len)
+            self.i2c.writeto_then_readfrom(txn.addr, txn.out, data)
+            txn.result = data
+        elif txn.kind == RDWR:
+            if self.smbus is None:
+                from smbus2 import SMBus
+                self.smbus = SMBus(I2C_BUS_NUMBER)
+            self.smbus.i2c_rdwr(*txn.out)
+        elif txn.kind == SCAN:
+            txn.result = self.i2c.scan()
+        # FLUSH: nothing to do, its completion is the barrier
+
+    def _run(self):
+        while self.running:
+            item = self.queue.get()
+            batch = [item]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            batch.sort(key=lambda entry: entry[:2])
+            start = time.monotonic()
+            while not self.i2c.try_lock():
+                pass
+            try:
+                for index, entry in enumerate(batch):
+                    if index and self._preempted(entry[0]):
+                        # A more urgent transaction arrived: run it first
+                        for rest in batch[index:]:
+                            self.queue.put(rest)
+                        break
+                    txn = entry[2]
+                    if txn is None:  # Shutdown marker
+                        self.running = False
+                        continue
+                    try:
+                        self._execute(txn)
+                    except Exception as e:
+                        txn.error = e
+                        if txn.kind in (WRITE, RDWR) and txn.out:
+                            print(f"I2C write to {format_address(txn.addr)} ({txn.client.name}) failed: {e}")
+                    self._finish(txn)
+            finally:
+                self.i2c.unlock()
+            with self.stats_lock:
+                self.busy_time += time.monotonic() - start
+                self.batches += 1
+
+    def _preempted(self, priority):
+        """True if the queue holds something more urgent than priority"""
+        with self.queue.mutex:
+            return bool(self.queue.queue) and self.queue.queue[0][0] < priority
+
+    def _finish(self, txn):
+        latency = time.monotonic() - txn.queued
+        with self.stats_lock:
+            stats = self.client_stats[txn.client.name]
+            stats["transactions"] += 1
+            stats["bytes"] += txn.nbytes
+            stats["latency_total"] += latency
+            stats["latency_max"] = max(stats["latency_max"], latency)
+            if txn.error:
+                stats["errors"] += 1
+        if txn.kind in (WRITE, RDWR) and txn.client.posted and txn.out:
+            txn.client.pending_writes.release()
+        txn.done.set()
+
+    def stats(self):
+        """Utilization plus per-client transaction counts, bytes and latency (ms)"""
+        with self.stats_lock:
+            elapsed = time.monotonic() - self.started
+            clients = {}
+            for name, s in self.client_stats.items():
+                count = s["transactions"]
+                clients[name] = {
+                    "transactions": count,
+                    "bytes": s["bytes"],
+                    "errors": s["errors"],
+                    "latency_avg_ms": (s["latency_total"] / count * 1000) if count else 0.0,
+                    "latency_max_ms": s["latency_max"] * 1000,
+                }
+            return {
+                "utilization": self.busy_time / elapsed if elapsed else 0.0,
+                "batches": self.batches,
+                "queued": self.queue.qsize(),
+                "clients": clients,
+            }
+
+    def report(self):
+        s = self.stats()
+        lines = [f"I2C bus: {s['utilization'] * 100:.1f}% busy, {s['batches']} batches, {s['queued']} queued"]
+        for name, c in s["clients"].items():
+            lines.append(f"  {name}: {c['transactions']} txns, {c['bytes']} B, "
+                         f"avg {c['latency_avg_ms']:.2f} ms, max {c['latency_max_ms']:.2f} ms, "
+                         f"{c['errors']} errors")
+        return "\n".join(lines)
+
+    def close(self):
+        """Drain queued work, stop the worker and deinit the physical bus; later
+        submits raise and anything still queued fails"""
+        if self.closing:
+            return
+        self.closing = True
+        self.queue.put((float("inf"), next(self.sequence), None))
+        self.worker.join(timeout=2.0)
+        while True:
+            try:
+                _, _, txn = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if txn is not None:
+                txn.error = RuntimeError("I2C bus is closed")
+                self._finish(txn)
+        try:
+            if self.smbus is not None:
+                self.smbus.close()
+            self.i2c.deinit()
+        except Exception as e:
+            print(f"Error deinitializing I2C bus: {e}")
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_bus():
+    """Return the process-wide SharedI2C, opening the bus on first use"""
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = SharedI2C()
+        return _bus
+
+
+def close_bus():
+    """Shut down the shared bus (call once, at process exit)"""
+    global _bus
+    with _bus_lock:
+        if _bus is not None:
+            _bus.close()
+            _bus = None
@@ -4,25 +4,26 @@ import logging
 import time
 import threading
 import asyncio
-import board
-import busio
 import os
 from adafruit_pca9685 import PCA9685
 from adafruit_motor import servo
 from display.eyes import RoboEyesDual
 from facetracking.face_tracking_qr import CombinedFaceTracking
+from facetracking.provisioning import CONNECTING, DONE, FAILED
 from interaction.touch_sensor import detect_continuous_touch
 from arms.arms_pwm import say_hi
 from recognition.person_recognition import recognize_image 
+import assistant_combined
 from assistant_combined import monitor_for_trigger, monitor_start, monitor_new
 from ipconfig.qr_reader import run_qr_scanner
+from i2c_bus import get_bus, close_bus, PRIORITY_SERVO
 
 # Initialize logging
 logging.basicConfig(filename='/home/pi/main_controller.log', level=logging.DEBUG)
 logging.info("Main controller started at %s", time.strftime("%Y-%m-%d %H:%M:%S"))
 
-# Initialize I2C and PCA9685 PWM controller
-i2c = busio.I2C(board.SCL, board.SDA)
+# Initialize PCA9685 PWM controller on the shared I2C bus
+i2c = get_bus().client("main_controller", PRIORITY_SERVO)
 pwm = PCA9685(i2c)
 pwm.frequency = 50  # Standard servo frequency (50Hz)
 
@@ -35,8 +36,38 @@ def run_eye_display():
     eyes.begin(128, 64, 50)
     eyes.Default()
 
+# Spoken feedback and eye mood for Wi-Fi provisioning states (others stay silent)
+PROVISIONING_FEEDBACK = {
+    CONNECTING: ("I found a Wi-Fi code. Connecting to the new network.", "default"),
+    DONE: ("I'm connected to the new Wi-Fi network.", "happy"),
+    FAILED: ("Sorry, I couldn't connect to that Wi-Fi network.", "tired"),
+}
+provisioning_lock = threading.Lock()  # Keeps one state's mood and message together
+
+def provisioning_feedback(job):
+    """Report provisioning progress through the eyes and voice without blocking the worker."""
+    logging.info("Wi-Fi provisioning %s%s", job.state, f": {job.error}" if job.error else "")
+    if job.state not in PROVISIONING_FEEDBACK:
+        return
+    message, mood = PROVISIONING_FEEDBACK[job.state]
+    def speak():
+        with provisioning_lock:
+            eyes = assistant_combined.eyes
+            try:
+                if eyes is not None:
+                    eyes.show_mood(mood)
+                # speak_text waits for the assistant's own speech through its speech lock
+                asyncio.run(assistant_combined.speak_text(message))
+            except Exception as e:
+                print(f"❌ Error giving provisioning feedback: {e}")
+            finally:
+                # Back to normal after the message, as run_emotion does
+                if eyes is not None and mood != "default":
+                    eyes.show_mood("default")
+    threading.Thread(target=speak, daemon=True).start()
+
 def run_face_tracking():
-    tracker = CombinedFaceTracking()
+    tracker = CombinedFaceTracking(on_provisioning=provisioning_feedback)
     tracker.run()
 
 def run_say_hi_once():
@@ -123,7 +154,8 @@ def cleanup():
     # De-initialize PWM and I2C
     try:
         pwm.deinit()
-        i2c.deinit()
+        print(get_bus().report())
+        close_bus()
         print("PWM and I2C de-initialized")
     except Exception as e:
         print(f"Error de-initializing PWM/I2C: {e}")
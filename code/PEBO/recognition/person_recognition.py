@@ -2,26 +2,34 @@
 import boto3
 import os
 from PIL import Image
+import io
 import time
-import tempfile
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 import base64
 
-def decrypt_image(input_path, output_path, key):
+def decrypt_bytes(data, key):
+    """Decrypt nonce + AES-GCM ciphertext (the captured.jpg.enc format) in memory."""
+    nonce = data[:12]
+    ciphertext = data[12:]
+    return AESGCM(key).decrypt(nonce, ciphertext, None)
+
+def decrypt_image_bytes(input_path, key):
+    """Read and decrypt an encrypted image; the plaintext never touches the disk."""
     try:
-        aesgcm = AESGCM(key)
         with open(input_path, 'rb') as f:
             data = f.read()
-        nonce = data[:12]
-        ciphertext = data[12:]
-        plaintext = aesgcm.decrypt(nonce, ciphertext, None)
-        with open(output_path, 'wb') as f:
-            f.write(plaintext)
-        # ~ print(f"Decrypted {input_path} to {output_path}")
+        plaintext = decrypt_bytes(data, key)
         print ("********Decrypted********")
+        return plaintext
     except Exception as e:
         raise Exception(f"Decryption error: {e}")
 
+def decrypt_image(input_path, output_path, key):
+    """Decrypt an encrypted image to a file (kept for tools that need one on disk)."""
+    plaintext = decrypt_image_bytes(input_path, key)
+    with open(output_path, 'wb') as f:
+        f.write(plaintext)
+
 def recognize_image():
     ACCESS_KEY = os.getenv("AWS_ACCESS_KEY_ID")
     SECRET_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
@@ -68,22 +76,17 @@ def recognize_image():
         return {"name": "NONE", "emotion": "NONE"}
 
     try:
-        with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as temp_file:
-            temp_image_path = temp_file.name
-        decrypt_image(encrypted_image_path, temp_image_path, aes_key)
+        image_bytes = decrypt_image_bytes(encrypted_image_path, aes_key)
     except Exception as e:
         print(f"Decryption error: {e}")
-        if os.path.exists(temp_image_path):
-            os.remove(temp_image_path)
         return {"name": "NONE", "emotion": "NONE"}
 
     try:
-        with Image.open(temp_image_path) as img:
+        with Image.open(io.BytesIO(image_bytes)) as img:
             if img.format != "JPEG":
                 raise Exception("Image is not a valid JPEG")
     except Exception as e:
         print(f"Image validation error: {e}")
-        os.remove(temp_image_path)
         return {"name": "NONE", "emotion": "NONE"}
 
     try:
@@ -95,22 +98,15 @@ def recognize_image():
                          aws_secret_access_key=SECRET_KEY)
     except Exception as e:
         print(f"AWS client initialization error: {e}")
-        os.remove(temp_image_path)
         return {"name": "NONE", "emotion": "NONE"}
 
     try:
-        s3.upload_file(temp_image_path, bucket_name, image_name, ExtraArgs={'ContentType': 'image/jpeg'})
+        s3.upload_fileobj(io.BytesIO(image_bytes), bucket_name, image_name, ExtraArgs={'ContentType': 'image/jpeg'})
         print("Image uploaded successfully")
     except Exception as e:
         print(f"Upload error: {e}")
-        os.remove(temp_image_path)
         return {"name": "NONE", "emotion": "NONE"}
 
-    try:
-        os.remove(temp_image_path)
-    except Exception as e:
-        print(f"Error removing temporary file: {e}")
-
     try:
         face_check = rekognition.detect_faces(
             Image={'S3Object': {'Bucket': bucket_name, 'Name': image_name}},